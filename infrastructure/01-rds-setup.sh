@@ -11,6 +11,7 @@ DB_USERNAME="admin"
 DB_PASSWORD="$(openssl rand -base64 16 | tr -dc 'a-zA-Z0-9' | head -c 20)"
 VPC_ID=""          # Set your VPC ID
 PRIVATE_SUBNETS="" # Comma-separated private subnet IDs
+PRIVATE_ROUTE_TABLES="" # Comma-separated route table IDs of the private subnets
 
 echo "=== Phase 1: RDS MSSQL Setup ==="
 
@@ -65,6 +66,23 @@ aws ec2 create-vpc-endpoint \
   --private-dns-enabled \
   --region $DATA_REGION
 
+# 6b. VPC endpoints for async tool jobs (job results in S3, self-invoke of the MCP server)
+echo "Creating S3 and Lambda VPC endpoints..."
+aws ec2 create-vpc-endpoint \
+  --vpc-id $VPC_ID \
+  --service-name com.amazonaws.$DATA_REGION.s3 \
+  --vpc-endpoint-type Gateway \
+  --route-table-ids $(echo $PRIVATE_ROUTE_TABLES | tr ',' ' ') \
+  --region $DATA_REGION
+
+aws ec2 create-vpc-endpoint \
+  --vpc-id $VPC_ID \
+  --service-name com.amazonaws.$DATA_REGION.lambda \
+  --vpc-endpoint-type Interface \
+  --subnet-ids $(echo $PRIVATE_SUBNETS | tr ',' ' ') \
+  --private-dns-enabled \
+  --region $DATA_REGION
+
 # 7. Create RDS instance
 echo "Creating RDS MSSQL instance (this takes ~10 minutes)..."
 aws rds create-db-instance \
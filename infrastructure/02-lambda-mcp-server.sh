@@ -8,6 +8,7 @@ DB_HOST=""          # RDS endpoint (from Phase 1)
 SECRET_ARN=""       # Secrets Manager ARN (from Phase 1)
 LAMBDA_SG=""        # Lambda SG (from Phase 1)
 PRIVATE_SUBNETS=""  # Comma-separated
+JOB_BUCKET="neobank-mcp-jobs-${ACCOUNT_ID}"  # Async job results (stays in the data region)
 
 echo "=== Phase 2: Lambda MCP Server ==="
 
@@ -24,6 +25,18 @@ aws iam put-role-policy --role-name neobank-lambda-mcp-role \
   --policy-name secrets-read \
   --policy-document "{\"Version\":\"2012-10-17\",\"Statement\":[{\"Effect\":\"Allow\",\"Action\":[\"secretsmanager:GetSecretValue\"],\"Resource\":\"$SECRET_ARN\"}]}"
 
+aws iam put-role-policy --role-name neobank-lambda-mcp-role \
+  --policy-name async-jobs \
+  --policy-document "{\"Version\":\"2012-10-17\",\"Statement\":[{\"Effect\":\"Allow\",\"Action\":[\"s3:GetObject\",\"s3:PutObject\"],\"Resource\":\"arn:aws:s3:::$JOB_BUCKET/jobs/*\"},{\"Effect\":\"Allow\",\"Action\":\"s3:ListBucket\",\"Resource\":\"arn:aws:s3:::$JOB_BUCKET\"},{\"Effect\":\"Allow\",\"Action\":\"lambda:InvokeFunction\",\"Resource\":\"arn:aws:lambda:$DATA_REGION:$ACCOUNT_ID:function:neobank-mcp-server-jobs\"}]}"
+
+# Job results bucket: private, encrypted, records expire after a day
+aws s3api create-bucket --bucket $JOB_BUCKET --region $DATA_REGION \
+  --create-bucket-configuration LocationConstraint=$DATA_REGION
+aws s3api put-public-access-block --bucket $JOB_BUCKET --region $DATA_REGION \
+  --public-access-block-configuration BlockPublicAcls=true,IgnorePublicAcls=true,BlockPublicPolicy=true,RestrictPublicBuckets=true
+aws s3api put-bucket-lifecycle-configuration --bucket $JOB_BUCKET --region $DATA_REGION \
+  --lifecycle-configuration '{"Rules":[{"ID":"expire-jobs","Status":"Enabled","Filter":{"Prefix":"jobs/"},"Expiration":{"Days":1}}]}'
+
 echo "Waiting for role propagation..."
 sleep 10
 
@@ -32,7 +45,7 @@ echo "Packaging Lambda..."
 cd src/lambda_mcp_server
 pip install pymssql -t package/
 cd package && zip -r ../lambda_mcp_server.zip . && cd ..
-zip lambda_mcp_server.zip lambda_function.py
+zip lambda_mcp_server.zip lambda_function.py secrets_cache.py result_cache.py pdf_text.py extraction_store.py report_search.py job_store.py
 cd ../..
 
 # 3. Deploy MCP Server Lambda
@@ -45,7 +58,25 @@ aws lambda create-function \
   --zip-file fileb://src/lambda_mcp_server/lambda_mcp_server.zip \
   --timeout 60 --memory-size 512 \
   --vpc-config SubnetIds=$PRIVATE_SUBNETS,SecurityGroupIds=$LAMBDA_SG \
-  --environment "Variables={DB_HOST=$DB_HOST,SECRET_ARN=$SECRET_ARN,DB_NAME=NeoBank}" \
+  --environment "Variables={DB_HOST=$DB_HOST,SECRET_ARN=$SECRET_ARN,DB_NAME=NeoBank,RESULT_CACHE_PATH=/tmp/result_cache.db,JOB_BUCKET=$JOB_BUCKET,JOB_FUNCTION_NAME=neobank-mcp-server-jobs}" \
+  --region $DATA_REGION
+
+# Async jobs run in a copy of the server with a longer timeout than interactive calls
+aws lambda create-function \
+  --function-name neobank-mcp-server-jobs \
+  --runtime python3.11 \
+  --handler lambda_function.handler \
+  --role arn:aws:iam::${ACCOUNT_ID}:role/neobank-lambda-mcp-role \
+  --zip-file fileb://src/lambda_mcp_server/lambda_mcp_server.zip \
+  --timeout 900 --memory-size 1024 \
+  --vpc-config SubnetIds=$PRIVATE_SUBNETS,SecurityGroupIds=$LAMBDA_SG \
+  --environment "Variables={DB_HOST=$DB_HOST,SECRET_ARN=$SECRET_ARN,DB_NAME=NeoBank,RESULT_CACHE_PATH=/tmp/result_cache.db,JOB_BUCKET=$JOB_BUCKET,JOB_FUNCTION_NAME=neobank-mcp-server-jobs,JOB_TIMEOUT_SECONDS=900}" \
+  --region $DATA_REGION
+
+# Async jobs record their own failures; Lambda must not re-run them
+aws lambda put-function-event-invoke-config \
+  --function-name neobank-mcp-server-jobs \
+  --maximum-retry-attempts 0 \
   --region $DATA_REGION
 
 # 4. Deploy Data Loader Lambda
@@ -53,7 +84,7 @@ echo "Deploying Data Loader Lambda..."
 cd src/lambda_mcp_server
 cp data_loader.py package/lambda_function_loader.py
 cd package && zip -r ../data_loader.zip . && cd ..
-zip data_loader.zip data_loader.py
+zip data_loader.zip data_loader.py secrets_cache.py
 cd ../..
 
 aws lambda create-function \
@@ -67,19 +98,16 @@ aws lambda create-function \
   --environment "Variables={DB_HOST=$DB_HOST,SECRET_ARN=$SECRET_ARN}" \
   --region $DATA_REGION
 
-# 5. Load sample data
+# 5. Load sample data (setup_all runs every step in dependency order and skips completed ones)
 echo "Loading sample data..."
-for action in create_db create_tables load_customers load_financial load_market load_reports load_transactions verify; do
-  echo "  Running: $action"
-  aws lambda invoke \
-    --function-name neobank-data-loader \
-    --cli-binary-format raw-in-base64-out \
-    --payload "{\"action\":\"$action\"}" \
-    --region $DATA_REGION \
-    /tmp/loader_result.json > /dev/null
-  cat /tmp/loader_result.json
-  echo ""
-done
+aws lambda invoke \
+  --function-name neobank-data-loader \
+  --cli-binary-format raw-in-base64-out \
+  --payload '{"action":"setup_all"}' \
+  --region $DATA_REGION \
+  /tmp/loader_result.json > /dev/null
+cat /tmp/loader_result.json
+echo ""
 
 echo ""
 echo "=== Phase 2 Complete ==="
@@ -33,7 +33,7 @@ aws lambda create-function \
   --handler proxy_function.handler \
   --role arn:aws:iam::${ACCOUNT_ID}:role/neobank-lambda-proxy-role \
   --zip-file fileb://src/lambda_proxy/proxy_function.zip \
-  --timeout 60 --memory-size 256 \
+  --timeout 90 --memory-size 256 \
   --environment "Variables={TARGET_FUNCTION=arn:aws:lambda:$DATA_REGION:$ACCOUNT_ID:function:neobank-mcp-server}" \
   --region $AI_REGION
 
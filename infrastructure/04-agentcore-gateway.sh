@@ -56,12 +56,22 @@ time.sleep(5)
 
 # 3. Create Gateway Target with tool schemas
 tool_schemas = [
-    {"name": "execute_sql_query", "description": "Execute read-only SQL queries on NeoBank MSSQL database.",
-     "inputSchema": {"type": "object", "properties": {"query": {"type": "string", "description": "SQL SELECT query"}}, "required": ["query"]}},
-    {"name": "get_schema_info", "description": "Get database schema — list tables or columns for a table.",
-     "inputSchema": {"type": "object", "properties": {"table_name": {"type": "string", "description": "Table name (omit to list all)"}}}},
+    {"name": "execute_sql_query", "description": "Execute read-only SQL queries on NeoBank MSSQL database. If truncated, call again with continuation_token.",
+     "inputSchema": {"type": "object", "properties": {"query": {"type": "string", "description": "SQL SELECT query"}, "parameters": {"type": "object"}, "page_size": {"type": "integer"}, "continuation_token": {"type": "string"}, "use_cache": {"type": "boolean"}, "format": {"type": "string", "enum": ["rows", "columnar"]}}, "required": ["query"]}},
+    {"name": "get_schema_info", "description": "Get database schema — list tables, columns for a table, or include_columns=true for the full schema.",
+     "inputSchema": {"type": "object", "properties": {"table_name": {"type": "string", "description": "Table name (omit to list all)"}, "include_columns": {"type": "boolean"}}}},
     {"name": "analyze_blob_data", "description": "Extract VARBINARY blob content from a table.",
      "inputSchema": {"type": "object", "properties": {"table": {"type": "string"}, "blob_column": {"type": "string"}, "row_id": {"type": "integer"}}, "required": ["table", "blob_column", "row_id"]}},
+    {"name": "search_research_reports", "description": "Full-text search over research report content; returns ranked row ids with snippets.",
+     "inputSchema": {"type": "object", "properties": {"query": {"type": "string"}, "top_k": {"type": "integer"}}, "required": ["query"]}},
+    {"name": "run_query_plan", "description": "Run a multi-step read-only SQL plan next to the database; later steps bind '$<step>.<column>' (first row) or '$<step>.<column>[*]' (all values, for IN %s; refused if that step was truncated) from earlier results.",
+     "inputSchema": {"type": "object", "properties": {"steps": {"type": "array", "items": {"type": "object", "properties": {"id": {"type": "string"}, "query": {"type": "string"}, "parameters": {"type": "object"}, "page_size": {"type": "integer"}}, "required": ["query"]}}}, "required": ["steps"]}},
+    {"name": "batch", "description": "Run several independent tool calls concurrently in one round trip; returns results in order.",
+     "inputSchema": {"type": "object", "properties": {"calls": {"type": "array", "items": {"type": "object", "properties": {"name": {"type": "string"}, "arguments": {"type": "object"}, "id": {"type": "string"}}, "required": ["name"]}}, "parallel": {"type": "boolean"}, "timeout_seconds": {"type": "number"}}, "required": ["calls"]}},
+    {"name": "submit_job", "description": "Start a slow tool call in the background; returns a job_id immediately. Fetch the result with get_job_result.",
+     "inputSchema": {"type": "object", "properties": {"tool": {"type": "string"}, "tool_arguments": {"type": "object"}}, "required": ["tool"]}},
+    {"name": "get_job_result", "description": "Get the status (pending, running, succeeded, failed) and result of a submitted job.",
+     "inputSchema": {"type": "object", "properties": {"job_id": {"type": "string"}}, "required": ["job_id"]}},
 ]
 
 target = client.create_gateway_target(
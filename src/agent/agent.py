@@ -1,21 +1,42 @@
 """NeoBank Agentic AI Research & Data Analyst — Strands Agent for AgentCore Runtime."""
+import asyncio
 import json
 import os
+import queue
+import signal
+import threading
 import time
 import traceback
+from contextlib import contextmanager
 
+import anyio
 import boto3
+import httpx
 from httpx_auth_awssigv4 import SigV4Auth
 from strands import Agent
 from strands.models import BedrockModel
+from strands.tools.executors import ConcurrentToolExecutor
 from strands.tools.mcp import MCPClient
+from strands.types.exceptions import MCPClientInitializationError
+from strands.types.tools import AgentTool
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
 from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig, RetrievalConfig
 from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
 
 GATEWAY_URL = os.environ.get("GATEWAY_URL", "")
 MEMORY_ID = os.environ.get("MEMORY_ID", "")
 AI_REGION = os.environ.get("AI_REGION", "eu-west-1")
+MODEL_ID = "eu.anthropic.claude-sonnet-4-20250514-v1:0"
+TOOLS_CACHE_TTL_SECONDS = float(os.environ.get("TOOLS_CACHE_TTL_SECONDS", "300"))
+# Tool calls from one model turn run concurrently over the shared MCP session, at most this many at once.
+TOOL_MAX_CONCURRENCY = int(os.environ.get("TOOL_MAX_CONCURRENCY", "4"))
+# Local HTTP server: concurrent agent runs, requests allowed to wait for a run slot,
+# how long they may wait, and how long shutdown waits for in-flight runs.
+SERVER_MAX_CONCURRENCY = int(os.environ.get("SERVER_MAX_CONCURRENCY", "4"))
+SERVER_MAX_QUEUE = int(os.environ.get("SERVER_MAX_QUEUE", "16"))
+SERVER_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("SERVER_QUEUE_TIMEOUT_SECONDS", "30"))
+SERVER_SHUTDOWN_GRACE_SECONDS = float(os.environ.get("SERVER_SHUTDOWN_GRACE_SECONDS", "60"))
 
 SYSTEM_PROMPT = """You are NeoBank's Enterprise AI Research & Data Analyst Agent.
 You query the NeoBank MSSQL database with GCC banking data.
@@ -23,45 +44,268 @@ You query the NeoBank MSSQL database with GCC banking data.
 Tables: customers (20 clients), financial_data (80 quarterly records), market_analysis (10 GCC sectors),
 research_reports (5 with VARBINARY blobs), transactions (1200 records).
 
-Workflow: 1) get_schema_info for structure 2) execute_sql_query with SELECT TOP N 3) analyze_blob_data for report_content
-Always use TOP clause. Never modify data. Be concise and professional.
+Workflow: 1) get_schema_info(include_columns=true) once for all tables, columns and keys 2) execute_sql_query with SELECT TOP N 3) search_research_reports to find reports by topic, then analyze_blob_data for report_content
+Use batch to run independent lookups in a single call, and run_query_plan when a query depends on an earlier query's results. For slow queries or large blob extractions, use submit_job and keep working, then get_job_result. Always use TOP clause. Never modify data. Be concise and professional.
 
 You have memory of past conversations. Use what you know about the user to provide better, more personalized responses.
 If you recall relevant facts or preferences from previous sessions, incorporate them naturally."""
 
 
+class _RefreshingSigV4Auth(httpx.Auth):
+    """SigV4 auth that re-signs with fresh credentials only when they rotate.
+
+    The boto3 session's refreshable credentials renew themselves shortly before
+    expiry; the SigV4Auth signer is rebuilt only when the frozen keys change.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self._lock = threading.Lock()
+        self._key = None
+        self._auth = None
+
+    def _current(self):
+        creds = self._session.get_credentials().get_frozen_credentials()
+        key = (creds.access_key, creds.token)
+        with self._lock:
+            if key != self._key:
+                self._auth = SigV4Auth(
+                    access_key=creds.access_key, secret_key=creds.secret_key,
+                    service="bedrock-agentcore", region=AI_REGION, token=creds.token,
+                )
+                self._key = key
+            return self._auth
+
+    def auth_flow(self, request):
+        yield from self._current().auth_flow(request)
+
+
+# Long-lived objects, created once per runtime process and reused across requests.
+_session = boto3.Session()
+_auth = _RefreshingSigV4Auth(_session)
+_lock = threading.Lock()
+_model = None
+# The current MCP client and every retired one still in use: generation -> entry.
+# A reset retires the current generation; a retired client is stopped only once
+# the last request using it has finished. _lock only guards these references and
+# counts; Gateway I/O (starting a client, listing tools) runs outside it.
+_mcp_clients = {}
+_mcp_generation = 0
+_mcp_starting = None  # set while one request starts the next client; the others wait on it
+
+_TRANSPORT_ERRORS = (McpError, MCPClientInitializationError, httpx.TransportError, anyio.ClosedResourceError,
+                     anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+
 def _get_auth():
-    session = boto3.Session()
-    creds = session.get_credentials().get_frozen_credentials()
-    return SigV4Auth(
-        access_key=creds.access_key, secret_key=creds.secret_key,
-        service="bedrock-agentcore", region=AI_REGION, token=creds.token,
-    )
+    return _auth
 
 
 def _create_transport(headers=None):
     return streamablehttp_client(GATEWAY_URL, auth=_get_auth())
 
 
-def handler(event, context=None):
-    """AgentCore Runtime HTTP handler."""
+def _get_model():
+    global _model
+    with _lock:
+        if _model is None:
+            _model = BedrockModel(
+                model_id=MODEL_ID,
+                region_name=AI_REGION, temperature=0.1, streaming=True,
+            )
+        return _model
+
+
+def _acquire_tools():
+    """Return (tools, generation) for the shared MCP client, holding a reference on it.
+
+    Only one request at a time starts a client or re-lists the tools after
+    TOOLS_CACHE_TTL_SECONDS; meanwhile others wait for the new client, or keep
+    using the previous tool list. A client that fails to list its tools is retired
+    before the error is raised. Every successful call must be paired with
+    ``_release_tools(generation)``.
+    """
+    global _mcp_starting
+    while True:
+        with _lock:
+            entry = _mcp_clients.get(_mcp_generation)
+            if entry is not None and not entry["retired"]:
+                generation = _mcp_generation
+                entry["users"] += 1
+                if entry["refreshing"] or time.time() - entry["loaded_at"] <= TOOLS_CACHE_TTL_SECONDS:
+                    return entry["tools"], generation
+                entry["refreshing"] = True
+                break
+            starting, owner = _mcp_starting, _mcp_starting is None
+            if owner:
+                starting = _mcp_starting = threading.Event()
+        if owner:
+            return _start_mcp_client(starting)
+        starting.wait()
+
     try:
-        prompt = event.get("prompt", "")
-        session_id = event.get("session_id", "default_session")
-        actor_id = event.get("actor_id", "default_user")
-
-        if not prompt:
-            body = event.get("body", "{}")
-            if isinstance(body, str):
-                body = json.loads(body)
-            prompt = body.get("prompt", "Hello, what can you help me with?")
-            session_id = body.get("session_id", session_id)
-            actor_id = body.get("actor_id", actor_id)
-
-        model = BedrockModel(
-            model_id="eu.anthropic.claude-sonnet-4-20250514-v1:0",
-            region_name=AI_REGION, temperature=0.1, streaming=True,
-        )
+        tools = entry["client"].list_tools_sync()
+    except Exception:
+        with _lock:
+            entry["refreshing"] = False
+        _reset_mcp_client(generation)
+        _release_tools(generation)
+        raise
+    with _lock:
+        entry.update(tools=tools, loaded_at=time.time(), refreshing=False)
+    return tools, generation
+
+
+def _start_mcp_client(starting):
+    """Start a client and list its tools, then publish it as the next generation."""
+    global _mcp_generation, _mcp_starting
+    client = None
+    try:
+        client = MCPClient(_create_transport)
+        client.start()
+        tools = client.list_tools_sync()
+    except Exception:
+        if client is not None:
+            _stop_client(client)
+        with _lock:
+            _mcp_starting = None
+        starting.set()
+        raise
+    with _lock:
+        _mcp_generation += 1
+        _mcp_clients[_mcp_generation] = {"client": client, "tools": tools, "loaded_at": time.time(),
+                                         "users": 1, "retired": False, "refreshing": False}
+        _mcp_starting = None
+        generation = _mcp_generation
+    starting.set()
+    return tools, generation
+
+
+def _release_tools(generation):
+    with _lock:
+        entry = _mcp_clients.get(generation)
+        if entry is None:
+            return
+        entry["users"] -= 1
+        if not (entry["retired"] and entry["users"] <= 0):
+            return
+        del _mcp_clients[generation]
+    _stop_client(entry["client"])
+
+
+def _reset_mcp_client(generation):
+    """Retire a broken MCP session so the next request reconnects.
+
+    Only the given generation is retired (a newer client started by another
+    request is left alone), and it is stopped once no request is using it.
+    """
+    with _lock:
+        entry = _mcp_clients.get(generation)
+        if entry is None or entry["retired"]:
+            return
+        entry["retired"] = True
+        if entry["users"] > 0:
+            return
+        del _mcp_clients[generation]
+    _stop_client(entry["client"])
+
+
+def _stop_client(client):
+    try:
+        client.stop(None, None, None)
+    except Exception:
+        pass
+
+
+def _is_transport_error(exc):
+    """True when ``exc`` (or an exception it was raised from) is a failure of the MCP session itself.
+
+    Model throttling, memory errors and the like leave the shared session intact.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, _TRANSPORT_ERRORS):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _parse_request(event):
+    """Return (prompt, session_id, actor_id, stream) from a direct or HTTP-style event."""
+    prompt = event.get("prompt", "")
+    session_id = event.get("session_id", "default_session")
+    actor_id = event.get("actor_id", "default_user")
+    stream = bool(event.get("stream", False))
+
+    if not prompt:
+        body = event.get("body", "{}")
+        if isinstance(body, str):
+            body = json.loads(body)
+        prompt = body.get("prompt", "Hello, what can you help me with?")
+        session_id = body.get("session_id", session_id)
+        actor_id = body.get("actor_id", actor_id)
+        stream = bool(body.get("stream", stream))
+    return prompt, session_id, actor_id, stream
+
+
+def _trace_steps(message):
+    """Trace entries for the tool calls and tool results in one conversation message."""
+    steps = []
+    for block in message.get("content", []):
+        if isinstance(block, dict):
+            if "toolUse" in block:
+                tu = block["toolUse"]
+                steps.append({"step": "tool_call", "tool": tu.get("name", ""), "input": tu.get("input", {})})
+            elif "toolResult" in block:
+                tr = block["toolResult"]
+                content_text = ""
+                for c in tr.get("content", []):
+                    if isinstance(c, dict) and "text" in c:
+                        content_text = c["text"][:500]
+                steps.append({"step": "tool_result", "status": tr.get("status", ""), "output": content_text})
+    return steps
+
+
+class _CappedTool(AgentTool):
+    """Delegates to a shared MCP tool while holding a per-request concurrency slot."""
+
+    def __init__(self, tool, semaphore):
+        super().__init__()
+        self._tool = tool
+        self._semaphore = semaphore
+
+    @property
+    def tool_name(self):
+        return self._tool.tool_name
+
+    @property
+    def tool_spec(self):
+        return self._tool.tool_spec
+
+    @property
+    def tool_type(self):
+        return self._tool.tool_type
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        async with self._semaphore:
+            async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+                yield event
+
+
+async def handler_async(event, context=None, callback_handler=None):
+    """Async agent handler.
+
+    Independent tool calls requested in the same model turn are dispatched
+    concurrently (at most TOOL_MAX_CONCURRENCY at a time) over the shared MCP
+    session. ``callback_handler`` is passed to the Strands agent and receives its
+    streaming events (``data`` for text deltas, ``message`` for completed messages).
+    """
+    try:
+        prompt, session_id, actor_id, _ = _parse_request(event)
+
+        t_setup = time.time()
+        model = _get_model()
 
         memory_config = AgentCoreMemoryConfig(
             memory_id=MEMORY_ID,
@@ -70,76 +314,209 @@ def handler(event, context=None):
             retrieval=RetrievalConfig(short_term=True, long_term=True),
         )
 
-        mcp_client = MCPClient(_create_transport)
-
-        with mcp_client:
-            tools = mcp_client.list_tools_sync()
+        try:
+            tools, generation = await asyncio.to_thread(_acquire_tools)
+        except Exception:
+            tools, generation = await asyncio.to_thread(_acquire_tools)
+        semaphore = asyncio.Semaphore(TOOL_MAX_CONCURRENCY)
+        setup_time = time.time() - t_setup
 
+        try:
             with AgentCoreMemorySessionManager(memory_config, region_name=AI_REGION) as session_manager:
+                agent_kwargs = {"callback_handler": callback_handler} if callback_handler else {}
                 agent = Agent(
-                    model=model, tools=tools,
+                    model=model, tools=[_CappedTool(tool, semaphore) for tool in tools],
                     system_prompt=SYSTEM_PROMPT,
                     session_manager=session_manager,
+                    tool_executor=ConcurrentToolExecutor(),
+                    **agent_kwargs,
                 )
                 t0 = time.time()
-                result = agent(prompt)
+                result = await agent.invoke_async(prompt)
                 total_time = time.time() - t0
+        except Exception as e:
+            if _is_transport_error(e):
+                _reset_mcp_client(generation)  # a broken Gateway session must not poison later requests
+            raise
+        finally:
+            _release_tools(generation)
+
+        trace = []
+        for msg in agent.messages:
+            trace.extend(_trace_steps(msg))
+
+        metrics = result.metrics.get_summary() if hasattr(result, "metrics") else {}
 
-            trace = []
-            for msg in agent.messages:
-                for block in msg.get("content", []):
-                    if isinstance(block, dict):
-                        if "toolUse" in block:
-                            tu = block["toolUse"]
-                            trace.append({"step": "tool_call", "tool": tu.get("name", ""), "input": tu.get("input", {})})
-                        elif "toolResult" in block:
-                            tr = block["toolResult"]
-                            content_text = ""
-                            for c in tr.get("content", []):
-                                if isinstance(c, dict) and "text" in c:
-                                    content_text = c["text"][:500]
-                            trace.append({"step": "tool_result", "status": tr.get("status", ""), "output": content_text})
-
-            metrics = result.metrics.get_summary() if hasattr(result, "metrics") else {}
-
-            return {
-                "response": str(result),
-                "trace": trace,
-                "timing": {"total_seconds": round(total_time, 2), "cycles": metrics.get("total_cycles", 0), "duration": round(metrics.get("total_duration", 0), 2)},
-                "model": "Claude Sonnet 4",
-                "memory": {"id": MEMORY_ID, "session_id": session_id, "actor_id": actor_id},
-            }
+        return {
+            "response": str(result),
+            "trace": trace,
+            "timing": {"total_seconds": round(total_time, 2), "setup_seconds": round(setup_time, 3), "cycles": metrics.get("total_cycles", 0), "duration": round(metrics.get("total_duration", 0), 2)},
+            "model": "Claude Sonnet 4",
+            "memory": {"id": MEMORY_ID, "session_id": session_id, "actor_id": actor_id},
+        }
     except Exception as e:
         traceback.print_exc()
         return {"response": f"Error: {str(e)}", "trace": [], "timing": {}, "model": "Claude Sonnet 4"}
 
 
-if __name__ == "__main__":
-    from http.server import HTTPServer, BaseHTTPRequestHandler
+def handler(event, context=None, callback_handler=None):
+    """AgentCore Runtime HTTP handler; runs ``handler_async`` on a fresh event loop."""
+    return asyncio.run(handler_async(event, context, callback_handler))
+
+
+_STREAM_END = object()
+
+
+def stream_handler(event, context=None):
+    """Streaming variant of ``handler``; yields events to be written as NDJSON lines.
+
+    Emits ``{"type": "text", "delta": ...}`` per model token, ``tool_call`` and
+    ``tool_result`` events as each tool round trip completes, and finally one
+    ``done`` event carrying the same fields as the non-streaming response.
+    """
+    events = queue.Queue()
+    t0 = time.time()
+    first_token = []
+
+    def on_event(**kwargs):
+        if kwargs.get("data"):
+            if not first_token:
+                first_token.append(time.time() - t0)
+            events.put({"type": "text", "delta": kwargs["data"]})
+        elif "message" in kwargs:
+            for step in _trace_steps(kwargs["message"]):
+                events.put({"type": step.pop("step"), **step})
+
+    def run():
+        try:
+            result = handler(event, context, callback_handler=on_event)
+            if first_token and result.get("timing"):
+                result["timing"]["first_token_seconds"] = round(first_token[0], 2)
+            events.put({"type": "done", **result})
+        finally:
+            events.put(_STREAM_END)
+
+    threading.Thread(target=run, daemon=True).start()
+    while True:
+        item = events.get()
+        if item is _STREAM_END:
+            return
+        yield item
+
+
+class _AdmissionGate:
+    """Caps concurrent agent runs and bounds how many requests may queue for a slot."""
+
+    def __init__(self, max_concurrency, max_queue):
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._admitted = threading.BoundedSemaphore(max_concurrency + max_queue)
+        self._idle = threading.Condition()
+        self._stats = {"in_flight": 0, "queued": 0, "completed": 0, "rejected": 0}
+        self.draining = False
+
+    @contextmanager
+    def admit(self, timeout):
+        """Yield True while holding a run slot, or False if the request should get a 503."""
+        if self.draining or not self._admitted.acquire(blocking=False):
+            with self._idle:
+                self._stats["rejected"] += 1
+            yield False
+            return
+        with self._idle:
+            self._stats["queued"] += 1
+        got_slot = self._slots.acquire(timeout=timeout)
+        with self._idle:
+            self._stats["queued"] -= 1
+            self._stats["in_flight" if got_slot else "rejected"] += 1
+        try:
+            yield got_slot
+        finally:
+            if got_slot:
+                self._slots.release()
+            self._admitted.release()
+            with self._idle:
+                if got_slot:
+                    self._stats["in_flight"] -= 1
+                    self._stats["completed"] += 1
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout):
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._stats["in_flight"] and not self._stats["queued"], timeout)
+
+    def stats(self):
+        with self._idle:
+            return dict(self._stats, draining=self.draining)
+
+
+def serve(port):
+    """Run the local HTTP entry point.
+
+    Each connection gets its own thread, so the health check is answered while
+    agent runs are in flight. Runs are limited to SERVER_MAX_CONCURRENCY; up to
+    SERVER_MAX_QUEUE further requests wait for a slot and anything beyond that is
+    refused with 503. SIGTERM/SIGINT stop accepting work and wait for in-flight
+    runs to finish before the process exits.
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    gate = _AdmissionGate(SERVER_MAX_CONCURRENCY, SERVER_MAX_QUEUE)
 
     class AgentHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(json.dumps(payload).encode())
+
         def do_POST(self):
             length = int(self.headers.get("Content-Length", 0))
             body = json.loads(self.rfile.read(length)) if length else {}
-            try:
-                result = handler(body)
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps(result).encode())
-            except Exception as e:
-                self.send_response(500)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(json.dumps({"error": str(e)}).encode())
+            with gate.admit(SERVER_QUEUE_TIMEOUT_SECONDS) as admitted:
+                if not admitted:
+                    self._send_json(503, {"error": "Agent is at capacity, retry shortly"}, {"Retry-After": "5"})
+                    return
+                if _parse_request(body)[3]:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    connected = True
+                    # Drain the stream even after the client goes away: the run thread
+                    # keeps going, so its slot stays held until the run actually ends.
+                    for item in stream_handler(body):
+                        if not connected:
+                            continue
+                        try:
+                            self.wfile.write(json.dumps(item, default=str).encode() + b"\n")
+                            self.wfile.flush()
+                        except (BrokenPipeError, ConnectionResetError):
+                            connected = False
+                    return
+                try:
+                    self._send_json(200, handler(body))
+                except Exception as e:
+                    self._send_json(500, {"error": str(e)})
 
         def do_GET(self):
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "healthy"}).encode())
+            self._send_json(200, {"status": "healthy", **gate.stats()})
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), AgentHandler)
 
-    port = int(os.environ.get("PORT", 8080))
-    server = HTTPServer(("0.0.0.0", port), AgentHandler)
-    print(f"Agent server running on port {port}")
+    def stop(signum, frame):
+        gate.draining = True
+        # shutdown() blocks until serve_forever() returns, so it cannot run on this thread.
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Agent server running on port {port} (concurrency {SERVER_MAX_CONCURRENCY}, queue {SERVER_MAX_QUEUE})")
     server.serve_forever()
+    drained = gate.wait_idle(SERVER_SHUTDOWN_GRACE_SECONDS)
+    server.server_close()
+    print("Agent server stopped" if drained else "Agent server stopped with runs still in flight")
+
+
+if __name__ == "__main__":
+    serve(int(os.environ.get("PORT", 8080)))
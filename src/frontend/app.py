@@ -12,6 +12,7 @@ st.set_page_config(page_title="NeoBank AI Analyst", page_icon="🏦", layout="wi
 AGENT_ARN = os.environ.get("AGENT_ARN", "")
 REGION = "eu-west-1"
 REPORT_BUCKET = os.environ.get("REPORT_BUCKET", "")
+STREAM_RESPONSES = os.environ.get("STREAM_RESPONSES", "true").lower() == "true"
 REPORTS = {
     "GCC Oil & Gas Sector Review 2025": "reports/01_GCC_Oil_Gas_Sector_Review_2025.pdf",
     "Credit Risk — Gulf Petrochemical": "reports/02_Credit_Risk_Gulf_Petrochemical.pdf",
@@ -37,6 +38,11 @@ def get_presigned_url(key, expiry=300):
     )
 
 
+def _agent_payload(prompt, session_id, **extra):
+    actor_id = re.sub(r"[^a-zA-Z0-9_-]", "", st.session_state.get("rm_select", "demo_user").replace(" ", "_").lower())
+    return json.dumps({"prompt": prompt, "session_id": session_id, "actor_id": actor_id, **extra}).encode()
+
+
 def invoke_agent(prompt, session_id):
     """Invoke agent and return parsed response."""
     client = get_client()
@@ -44,7 +50,7 @@ def invoke_agent(prompt, session_id):
     response = client.invoke_agent_runtime(
         agentRuntimeArn=AGENT_ARN,
         runtimeSessionId=session_id,
-        payload=json.dumps({"prompt": prompt, "session_id": session_id, "actor_id": re.sub(r"[^a-zA-Z0-9_-]", "", st.session_state.get("rm_select", "demo_user").replace(" ", "_").lower())}).encode(),
+        payload=_agent_payload(prompt, session_id),
         qualifier="DEFAULT",
     )
     chunks = []
@@ -56,6 +62,52 @@ def invoke_agent(prompt, session_id):
     return parsed
 
 
+def invoke_agent_stream(prompt, session_id):
+    """Invoke agent in streaming mode and yield its NDJSON events as they arrive."""
+    client = get_client()
+    t0 = time.time()
+    response = client.invoke_agent_runtime(
+        agentRuntimeArn=AGENT_ARN,
+        runtimeSessionId=session_id,
+        payload=_agent_payload(prompt, session_id, stream=True),
+        qualifier="DEFAULT",
+    )
+    for line in response["response"].iter_lines():
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        if event.get("type") == "done":
+            event["wall_time"] = round(time.time() - t0, 2)
+        yield event
+
+
+def _render_stream(prompt, session_id):
+    """Render text deltas and tool steps as they arrive; return the final response data."""
+    status = st.status("⏳ Analyzing...", expanded=False)
+    placeholder = st.empty()
+    text = ""
+    data = {}
+    for event in invoke_agent_stream(prompt, session_id):
+        kind = event.get("type")
+        if kind == "text":
+            text += event.get("delta", "")
+            placeholder.markdown(text + "▌")
+        elif kind == "tool_call":
+            text = ""  # narration before a tool call is superseded by the next turn
+            placeholder.empty()
+            status.update(label=f"🔧 Running `{event.get('tool', '')}`...")
+            status.markdown(f"🔧 `{event.get('tool', '')}`")
+        elif kind == "tool_result":
+            status.markdown("❌ Tool error" if event.get("status") == "error" else "✅ Tool result received")
+            status.update(label="⏳ Analyzing...")
+        elif kind == "done":
+            data = event
+    status.update(label="✅ Done", state="complete")
+    data.setdefault("response", text or "No response")
+    placeholder.markdown(data["response"])
+    return data
+
+
 def render_trace(data):
     """Render the agent trace in a structured expander."""
     trace = data.get("trace", [])
@@ -353,26 +405,30 @@ def _process_prompt(prompt, container=None):
         )
 
     with st.chat_message("assistant"):
-        with st.spinner("⏳ Analyzing..."):
-            try:
-                data = invoke_agent(agent_prompt, st.session_state.session_id)
+        try:
+            if STREAM_RESPONSES:
+                data = _render_stream(agent_prompt, st.session_state.session_id)
+                response = data.get("response", "No response")
+            else:
+                with st.spinner("⏳ Analyzing..."):
+                    data = invoke_agent(agent_prompt, st.session_state.session_id)
                 response = data.get("response", "No response")
                 st.markdown(response)
-                for item in data.get("trace", []):
-                    if item.get("step") == "tool_result" and item.get("status", "success") != "error":
-                        try:
-                            rd = json.loads(item.get("output", "{}"))
-                            if "preview" in rd:
-                                with st.expander(f"📄 Raw Document Content — {rd.get('content_type', '')} ({rd.get('size_bytes', 0):,} bytes)", expanded=True):
-                                    st.text_area("", rd["preview"], height=400, key=f"blob_{id(item)}")
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-                render_trace(data)
-                st.session_state.messages.append({"role": "assistant", "content": response, "trace_data": data})
-            except Exception as e:
-                err = f"Error: {str(e)}"
-                st.error(err)
-                st.session_state.messages.append({"role": "assistant", "content": err})
+            for item in data.get("trace", []):
+                if item.get("step") == "tool_result" and item.get("status", "success") != "error":
+                    try:
+                        rd = json.loads(item.get("output", "{}"))
+                        if "preview" in rd:
+                            with st.expander(f"📄 Raw Document Content — {rd.get('content_type', '')} ({rd.get('size_bytes', 0):,} bytes)", expanded=True):
+                                st.text_area("", rd["preview"], height=400, key=f"blob_{id(item)}")
+                    except (json.JSONDecodeError, TypeError):
+                        pass
+            render_trace(data)
+            st.session_state.messages.append({"role": "assistant", "content": response, "trace_data": data})
+        except Exception as e:
+            err = f"Error: {str(e)}"
+            st.error(err)
+            st.session_state.messages.append({"role": "assistant", "content": err})
 
 
 def render_sample_queries():
@@ -1,22 +1,450 @@
 """One-time data loader — creates NeoBank database and loads sample data."""
-import json
 import os
-import boto3
+import random
+import textwrap
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import pymssql
 
+from secrets_cache import get_secret_cache
 
-def get_connection(database="master"):
-    sm = boto3.client("secretsmanager", region_name="me-south-1")
-    secret = json.loads(sm.get_secret_value(SecretId=os.environ["SECRET_ARN"])["SecretString"])
-    return pymssql.connect(
-        server=os.environ["DB_HOST"], port=1433,
-        user=secret["username"], password=secret["password"],
-        database=database, autocommit=True,
-    )
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", "5000"))
+# SQL Server caps one INSERT at 1000 row constructors and 2100 parameters.
+MAX_ROWS_PER_INSERT = 1000
+MAX_PARAMS_PER_INSERT = 2000
+
+
+def get_connection(database="master", autocommit=True):
+    def connect(secret):
+        return pymssql.connect(
+            server=os.environ["DB_HOST"], port=1433,
+            user=secret["username"], password=secret["password"],
+            database=database, autocommit=autocommit,
+        )
+    return get_secret_cache().connect(connect)
+
+
+def bulk_insert(conn, table, columns, rows, row_sql=None, batch_size=BULK_BATCH_SIZE, rows_per_insert=None):
+    """Insert an iterable of row tuples with multi-row VALUES statements.
+
+    Rows are consumed lazily and committed every ``batch_size`` rows, so memory
+    stays bounded by one batch. ``row_sql`` overrides the per-row VALUES template,
+    e.g. to wrap a parameter in DATEADD. Returns row count and throughput.
+    """
+    row_sql = row_sql or "(" + ",".join(["%s"] * len(columns)) + ")"
+    per_insert = max(1, min(rows_per_insert or MAX_ROWS_PER_INSERT, MAX_PARAMS_PER_INSERT // row_sql.count("%s")))
+    prefix = f"INSERT INTO {table} ({','.join(columns)}) VALUES "
+    cursor = conn.cursor()
+    t0 = time.time()
+    total, batches, pending, in_batch = 0, 0, [], 0
+
+    def flush():
+        if pending:
+            cursor.execute(prefix + ",".join([row_sql] * len(pending)), tuple(v for row in pending for v in row))
+            pending.clear()
+
+    for row in rows:
+        pending.append(row)
+        in_batch += 1
+        total += 1
+        if len(pending) >= per_insert:
+            flush()
+        if in_batch >= batch_size:
+            flush()
+            conn.commit()
+            batches += 1
+            in_batch = 0
+    flush()
+    if in_batch:
+        conn.commit()
+        batches += 1
+    seconds = time.time() - t0
+    return {"rows": total, "batches": batches, "seconds": round(seconds, 3),
+            "rows_per_second": round(total / seconds) if seconds else total}
+
+
+def _financial_rows(customer_ids):
+    rng = random.Random(42)  # private stream: concurrent loads must not interleave draws
+    ratings = ['AAA','AA','A','BBB','BB']
+    for cid in customer_ids:
+        for q in ['Q1','Q2','Q3','Q4']:
+            yield (cid, 2025, q, rng.randint(5000000,55000000), rng.randint(500000,10500000),
+                   rng.randint(50000000,550000000), rng.randint(20000000,320000000),
+                   rng.randint(10000000,210000000), round(rng.random()*3,4),
+                   round(0.8+rng.random()*2,4), round(rng.random()*25,4),
+                   rng.choice(ratings), f"2025-{['03','06','09','12'][['Q1','Q2','Q3','Q4'].index(q)]}-30")
+
+
+def _transaction_rows(count, customer_count=20):
+    rng = random.Random(99)  # private stream: concurrent loads must not interleave draws
+    types = ['Deposit','Withdrawal','Transfer','Loan','Payment','FX','Trade']
+    currencies = ['USD','BHD','SAR','AED']
+    counterparties = ['Citibank NY','HSBC London','Deutsche Bank','JP Morgan','Standard Chartered']
+    for i in range(count):
+        cid = rng.randint(1,customer_count)
+        day_offset = rng.randint(0,364)
+        yield (cid, day_offset, rng.choice(types), rng.randint(1000,5000000),
+               rng.choice(currencies), rng.choice(counterparties),
+               f'Banking transaction {i+1}',
+               'Completed' if rng.random()>0.05 else ('Pending' if rng.random()>0.5 else 'Failed'),
+               1 if rng.random()<0.04 else 0)
+
+
+FINANCIAL_COLUMNS = ["customer_id", "fiscal_year", "fiscal_quarter", "revenue_usd", "net_income_usd",
+                     "total_assets_usd", "total_liabilities_usd", "equity_usd", "debt_to_equity_ratio",
+                     "current_ratio", "roe_pct", "credit_rating", "report_date"]
+TRANSACTION_COLUMNS = ["customer_id", "transaction_date", "transaction_type", "amount_usd", "currency",
+                       "counterparty", "description", "status", "risk_flag"]
+TRANSACTION_ROW_SQL = "(%s,DATEADD(DAY,%s,'2025-01-01'),%s,%s,%s,%s,%s,%s,%s)"
+CUSTOMER_COLUMNS = ["customer_code", "full_name", "customer_type", "country", "sector", "risk_rating",
+                    "relationship_manager", "onboarding_date", "kyc_status", "total_exposure_usd"]
+MARKET_COLUMNS = ["sector", "region", "analysis_date", "gdp_growth_pct", "inflation_rate_pct", "interest_rate_pct",
+                  "sector_outlook", "market_cap_usd_bn", "pe_ratio", "analyst_recommendation", "key_risks", "source"]
+REPORT_COLUMNS = ["title", "report_type", "customer_id", "sector", "author", "publish_date", "summary",
+                  "report_content", "content_type", "file_size_bytes", "classification", "tags"]
+
+# Synthetic data for the "generate" action. Weights follow the sample data's mix
+# (mostly Bahraini corporates, low/medium risk) so scaled-up volumes keep its shape.
+GEN_COUNTRIES = (["Bahrain"] * 12) + (["Saudi Arabia"] * 2) + (["UAE"] * 2) + ["Kuwait", "Oman", "Qatar"]
+GEN_SECTORS = ["Oil & Gas", "Financial Services", "Telecommunications", "Manufacturing", "Aviation", "Real Estate",
+               "Petrochemicals", "Trading", "Healthcare", "Construction", "Technology", "Logistics", "Tourism"]
+GEN_REGIONS = ["GCC", "Bahrain", "Saudi Arabia", "UAE"]
+GEN_RMS = ["Ahmed Al-Khalifa", "Fatima Hassan", "Mohammed Al-Dosari", "Sara Al-Mannai"]
+GEN_NAME_PREFIXES = ["Gulf", "Arabian", "Bahrain", "Al Noor", "Manama", "Pearl", "Desert", "Khaleeji", "Dilmun", "Levant"]
+GEN_NAME_SUFFIXES = ["Holdings", "Industries", "Group", "Trading", "Investments", "Partners", "Enterprises", "Company"]
+GEN_OUTLOOKS = ["Positive", "Positive", "Neutral", "Negative"]
+GEN_REPORT_TYPES = ["Market", "Credit", "Regulatory", "Annual"]
+
+
+def _generated_customers(rng, count, prefix):
+    for n in range(1, count + 1):
+        sector = rng.choice(GEN_SECTORS)
+        yield (f"{prefix}{n:08d}",
+               f"{rng.choice(GEN_NAME_PREFIXES)} {sector.split()[0]} {rng.choice(GEN_NAME_SUFFIXES)} {n}",
+               rng.choices(["Corporate", "SME", "Government"], weights=[14, 3, 3])[0],
+               rng.choice(GEN_COUNTRIES), sector,
+               rng.choices(["Low", "Medium", "High"], weights=[10, 8, 2])[0],
+               rng.choice(GEN_RMS),
+               f"{rng.randint(2014, 2023)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+               "Verified" if rng.random() > 0.05 else "Pending",
+               round(rng.lognormvariate(17.8, 1.0), 2))
+
+
+def _generated_financials(rng, customer_ids, years):
+    ratings = ['AAA','AA','A','BBB','BB']
+    for cid in customer_ids:
+        for year in years:
+            for q, month in (("Q1", "03"), ("Q2", "06"), ("Q3", "09"), ("Q4", "12")):
+                yield (cid, year, q, rng.randint(5000000,55000000), rng.randint(500000,10500000),
+                       rng.randint(50000000,550000000), rng.randint(20000000,320000000),
+                       rng.randint(10000000,210000000), round(rng.random()*3,4),
+                       round(0.8+rng.random()*2,4), round(rng.random()*25,4),
+                       rng.choice(ratings), f"{year}-{month}-30")
+
+
+def _generated_transactions(rng, count, customer_ids):
+    types = ['Deposit','Withdrawal','Transfer','Loan','Payment','FX','Trade']
+    currencies = ['USD','BHD','SAR','AED']
+    counterparties = ['Citibank NY','HSBC London','Deutsche Bank','JP Morgan','Standard Chartered']
+    for i in range(count):
+        yield (rng.choice(customer_ids), rng.randint(0,364), rng.choice(types), rng.randint(1000,5000000),
+               rng.choice(currencies), rng.choice(counterparties), f'Generated transaction {i+1}',
+               'Completed' if rng.random()>0.05 else ('Pending' if rng.random()>0.5 else 'Failed'),
+               1 if rng.random()<0.04 else 0)
+
+
+def _generated_markets(rng, count):
+    for n in range(count):
+        sector = GEN_SECTORS[n % len(GEN_SECTORS)]
+        month = n // len(GEN_SECTORS)
+        yield (sector, rng.choice(GEN_REGIONS), f"{2025 - month // 12}-{12 - month % 12:02d}-15",
+               round(rng.uniform(1.5, 8.5), 4), round(rng.uniform(1.0, 3.5), 4), round(rng.uniform(4.5, 5.5), 4),
+               rng.choice(GEN_OUTLOOKS), round(rng.uniform(10, 900), 4), round(rng.uniform(8, 36), 2),
+               f"{rng.choice(['Buy', 'Hold', 'Overweight', 'Strong Buy'])} — generated outlook for {sector}",
+               "Generated risk factors: rates, oil prices, regulation", "NeoBank Research (generated)")
+
+
+def _text_pdf(lines, filler_bytes=None):
+    """A small but structurally real PDF: one FlateDecode text stream, plus an image-like
+    filler stream of ``filler_bytes(len(text_stream))`` when given."""
+    escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in lines)
+    content = "\n".join(f"BT /F1 10 Tf 72 {760 - 14 * i} Td ({line}) Tj ET" for i, line in enumerate(escaped)).encode("latin-1")
+    text_stream = zlib.compress(content)
+    pdf = (b"%PDF-1.4\n"
+           + b"1 0 obj\n<< /Length " + str(len(text_stream)).encode() + b" /Filter /FlateDecode >>\nstream\n"
+           + text_stream + b"\nendstream\nendobj\n")
+    if filler_bytes:
+        filler = filler_bytes(len(text_stream))
+        pdf += (b"2 0 obj\n<< /Subtype /Image /Length " + str(len(filler)).encode() + b" >>\nstream\n"
+                + filler + b"\nendstream\nendobj\n")
+    return pdf + b"%%EOF\n"
+
+
+def _generated_pdf(rng, title, sector, target_bytes):
+    lines = [title, f"Sector: {sector}"] + [
+        f"Finding {i}: {sector} revenue {rng.choice(['grew', 'declined', 'held steady'])} "
+        f"{rng.uniform(0.5, 15):.1f} percent with exposure of USD {rng.randint(1, 500)}M."
+        for i in range(1, 40)
+    ]
+    return _text_pdf(lines, lambda text_bytes: rng.randbytes(max(0, target_bytes - text_bytes - 200)))
+
+
+def _generated_reports(rng, count, customer_ids, target_bytes):
+    for n in range(1, count + 1):
+        sector = rng.choice(GEN_SECTORS)
+        report_type = rng.choice(GEN_REPORT_TYPES)
+        title = f"{sector} {report_type} Review {n}"
+        blob = _generated_pdf(rng, title, sector, target_bytes)
+        yield (title, report_type, rng.choice(customer_ids) if report_type in ("Credit", "Annual") else None,
+               sector, rng.choice(GEN_RMS), f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+               f"Generated {report_type.lower()} report on the {sector} sector.", blob, "application/pdf",
+               len(blob), rng.choice(["Internal", "Confidential"]), f"{sector.lower()},{report_type.lower()},generated")
+
+
+# Covering indexes for the agent's common access paths: (name, table, key columns, included columns).
+AGENT_INDEXES = [
+    ("IX_transactions_customer_date", "transactions", "customer_id, transaction_date",
+     "transaction_type, amount_usd, currency, status, risk_flag"),
+    ("IX_transactions_date", "transactions", "transaction_date",
+     "customer_id, transaction_type, amount_usd, status, risk_flag"),
+    ("IX_customers_rm", "customers", "relationship_manager",
+     "full_name, country, sector, risk_rating, total_exposure_usd"),
+    ("IX_customers_country", "customers", "country",
+     "full_name, sector, risk_rating, relationship_manager, total_exposure_usd"),
+    ("IX_financial_customer_period", "financial_data", "customer_id, fiscal_year, fiscal_quarter",
+     "revenue_usd, net_income_usd, debt_to_equity_ratio, credit_rating"),
+]
+
+# Queries shaped like the agent's typical SQL, used to report before/after logical reads.
+REFERENCE_QUERIES = [
+    ("transactions_by_customer_and_date",
+     "SELECT TOP 100 transaction_date, transaction_type, amount_usd, status FROM transactions "
+     "WHERE customer_id = 1 AND transaction_date >= '2025-07-01' ORDER BY transaction_date DESC"),
+    ("flagged_transactions_last_quarter",
+     "SELECT COUNT(*) AS flagged FROM transactions WHERE risk_flag = 1 AND transaction_date >= '2025-10-01'"),
+    ("portfolio_by_relationship_manager",
+     "SELECT full_name, sector, risk_rating, total_exposure_usd FROM customers "
+     "WHERE relationship_manager = 'Fatima Hassan' ORDER BY total_exposure_usd DESC"),
+    ("customers_by_country",
+     "SELECT country, COUNT(*) AS customers, SUM(total_exposure_usd) AS exposure FROM customers "
+     "WHERE country = 'Bahrain' GROUP BY country"),
+    ("quarterly_financials_for_customer",
+     "SELECT fiscal_quarter, revenue_usd, net_income_usd, debt_to_equity_ratio FROM financial_data "
+     "WHERE customer_id = 1 AND fiscal_year = 2025 ORDER BY fiscal_quarter"),
+]
+
+
+def _session_logical_reads(cursor):
+    cursor.execute("SELECT logical_reads FROM sys.dm_exec_sessions WHERE session_id = @@SPID")
+    return cursor.fetchone()[0]
+
+
+def measure_reference_queries(cursor):
+    """Logical reads and elapsed time per reference query, from the session's DMV counters."""
+    results = {}
+    for name, sql in REFERENCE_QUERIES:
+        before = _session_logical_reads(cursor)
+        t0 = time.time()
+        cursor.execute(sql)
+        cursor.fetchall()
+        elapsed_ms = round((time.time() - t0) * 1000, 1)
+        results[name] = {"logical_reads": _session_logical_reads(cursor) - before, "ms": elapsed_ms}
+    return results
+
+
+def optimize(event):
+    """Create covering indexes for the agent's access paths, refresh statistics, and
+    report logical reads for the reference queries before and after."""
+    conn = get_connection("BankABC")
+    cursor = conn.cursor()
+    try:
+        before = measure_reference_queries(cursor)
+        indexes = {}
+        for name, table, keys, include in AGENT_INDEXES:
+            cursor.execute("SELECT 1 FROM sys.indexes WHERE name = %s AND object_id = OBJECT_ID(%s)", (name, table))
+            if cursor.fetchone():
+                indexes[name] = "exists"
+                continue
+            cursor.execute(f"CREATE NONCLUSTERED INDEX {name} ON {table} ({keys}) INCLUDE ({include})")
+            indexes[name] = "created"
+        sampling = " WITH FULLSCAN" if event.get("fullscan") else ""
+        statistics = []
+        for table in sorted({t for _, t, _, _ in AGENT_INDEXES}):
+            cursor.execute(f"UPDATE STATISTICS {table}{sampling}")
+            statistics.append(table)
+        after = measure_reference_queries(cursor)
+    finally:
+        conn.close()
+    return {
+        "status": f"{sum(v == 'created' for v in indexes.values())} indexes created, statistics updated",
+        "indexes": indexes,
+        "statistics_updated": statistics,
+        "reference_queries": {name: {"before": before[name], "after": after[name]} for name in before},
+    }
+
+
+# setup_all dependency graph: step -> (dependencies, table it fills, sample row count).
+SETUP_STEPS = {
+    "create_db": ([], None, 0),
+    "create_tables": (["create_db"], None, 0),
+    "add_row_version": (["create_tables"], None, 0),
+    "load_customers": (["create_tables"], "customers", 20),
+    "load_market": (["create_tables"], "market_analysis", 10),
+    "load_reports": (["create_tables"], "research_reports", 5),
+    "load_financial": (["load_customers"], "financial_data", 80),
+    "load_transactions": (["load_customers"], "transactions", 1200),
+    "optimize": (["load_financial", "load_transactions", "load_market", "load_reports"], None, 0),
+    "verify": (["optimize"], None, 0),
+}
+SETUP_MAX_WORKERS = int(os.environ.get("SETUP_MAX_WORKERS", "4"))
+
+
+def _setup_step_done(step, event):
+    """Return a skip reason if the step's target already exists, else None.
+
+    Raises when a table holds a partial load, since re-running it would duplicate rows.
+    """
+    _, table, expected = SETUP_STEPS[step]
+    if step == "create_db":
+        conn = get_connection("master")
+        query, params = "SELECT COUNT(*) FROM sys.databases WHERE name = 'BankABC'", ()
+    elif step == "create_tables":
+        conn = get_connection("BankABC")
+        query, params = ("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME IN "
+                         "('customers','financial_data','market_analysis','research_reports','transactions')"), ()
+    elif step == "add_row_version":
+        conn = get_connection("BankABC")
+        query, params = "SELECT COL_LENGTH('research_reports', 'row_version')", ()
+    elif step == "optimize":
+        conn = get_connection("BankABC")
+        names = [name for name, _, _, _ in AGENT_INDEXES]
+        query, params = f"SELECT COUNT(*) FROM sys.indexes WHERE name IN ({','.join(['%s'] * len(names))})", tuple(names)
+    elif table:
+        conn = get_connection("BankABC")
+        query, params = f"SELECT COUNT(*) FROM {table}", ()
+    else:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params) if params else cursor.execute(query)
+        found = cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+    if step == "create_db":
+        return "database exists" if found else None
+    if step == "create_tables":
+        return "all tables exist" if found == 5 else None
+    if step == "add_row_version":
+        return "row_version exists" if found is not None else None
+    if step == "optimize":
+        return "all indexes exist" if found == len(AGENT_INDEXES) else None
+    if step == "load_transactions":
+        expected = int(event.get("count", expected))
+    if found >= expected:
+        return f"{table} already has {found} rows"
+    if found:
+        raise RuntimeError(f"{table} has a partial load ({found}/{expected} rows); clear it before re-running")
+    return None
+
+
+def _run_setup_step(step, event):
+    t0 = time.time()
+    skipped = _setup_step_done(step, event)
+    if skipped:
+        return {"status": "skipped", "reason": skipped, "seconds": round(time.time() - t0, 3)}
+    step_event = {k: v for k, v in event.items() if k in ("mode", "count", "batch_size", "fullscan")}
+    result = handler(dict(step_event, action=step), None)
+    status = "failed" if "error" in result else "done"
+    return {"status": status, "result": result, "seconds": round(time.time() - t0, 3)}
+
+
+def setup_all(event):
+    """Build the whole environment: run SETUP_STEPS in dependency order, independent
+    loads concurrently, skipping steps whose data is already in place."""
+    t0 = time.time()
+    steps, pending, running = {}, dict(SETUP_STEPS), {}
+    with ThreadPoolExecutor(max_workers=SETUP_MAX_WORKERS) as pool:
+        while pending or running:
+            for step, (deps, _, _) in list(pending.items()):
+                if any(steps.get(d, {}).get("status") in ("failed", "blocked") for d in deps):
+                    steps[step] = {"status": "blocked", "reason": "a dependency failed"}
+                    del pending[step]
+                elif all(steps.get(d, {}).get("status") in ("done", "skipped") for d in deps):
+                    running[pool.submit(_run_setup_step, step, event)] = step
+                    del pending[step]
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                try:
+                    steps[step] = future.result()
+                except Exception as e:
+                    steps[step] = {"status": "failed", "error": str(e)}
+    failed = [s for s, r in steps.items() if r["status"] in ("failed", "blocked")]
+    return {
+        "status": "setup incomplete" if failed else "setup complete",
+        "failed": failed,
+        "steps": {step: steps[step] for step in SETUP_STEPS},
+        "total_seconds": round(time.time() - t0, 3),
+    }
+
+
+def generate(event):
+    """Load synthetic data at ``scale`` x the sample volumes, deterministically per ``seed``.
+
+    Every table draws from its own seeded RNG and is streamed through bulk_insert,
+    so only customer ids (needed for foreign keys) are held in memory. Generated
+    customer codes are prefixed ``G<seed>-``, so each seed can be loaded once.
+    """
+    scale = float(event.get("scale", 10))
+    seed = int(event.get("seed", 1))
+    tables = event.get("tables") or ["customers", "financial_data", "market_analysis", "research_reports", "transactions"]
+    batch_size = int(event.get("batch_size", BULK_BATCH_SIZE))
+    prefix = f"G{seed}-"
+    conn = get_connection("BankABC", autocommit=False)
+    results = {}
+    try:
+        if "customers" in tables:
+            results["customers"] = bulk_insert(
+                conn, "customers", CUSTOMER_COLUMNS,
+                _generated_customers(random.Random(seed * 7919 + 1), max(1, int(20 * scale)), prefix), batch_size=batch_size)
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM customers WHERE customer_code LIKE %s ORDER BY id", (prefix + "%",))
+        customer_ids = [r[0] for r in cursor.fetchall()]
+        if not customer_ids:
+            return {"error": f"No generated customers for seed {seed}; include 'customers' in tables first"}
+        if "financial_data" in tables:
+            results["financial_data"] = bulk_insert(
+                conn, "financial_data", FINANCIAL_COLUMNS,
+                _generated_financials(random.Random(seed * 7919 + 2), customer_ids, [2025]), batch_size=batch_size)
+        if "market_analysis" in tables:
+            results["market_analysis"] = bulk_insert(
+                conn, "market_analysis", MARKET_COLUMNS,
+                _generated_markets(random.Random(seed * 7919 + 3), max(1, int(10 * scale))), batch_size=batch_size)
+        if "research_reports" in tables:
+            # Blobs are large; keep statements and batches small.
+            results["research_reports"] = bulk_insert(
+                conn, "research_reports", REPORT_COLUMNS,
+                _generated_reports(random.Random(seed * 7919 + 4), max(1, int(5 * scale)), customer_ids,
+                                   int(event.get("report_bytes", 64 * 1024))),
+                batch_size=min(batch_size, 50), rows_per_insert=5)
+        if "transactions" in tables:
+            results["transactions"] = bulk_insert(
+                conn, "transactions", TRANSACTION_COLUMNS,
+                _generated_transactions(random.Random(seed * 7919 + 5), int(1200 * scale), customer_ids),
+                row_sql=TRANSACTION_ROW_SQL, batch_size=batch_size)
+    finally:
+        conn.close()
+    return {"status": f"Generated data at scale {scale:g} (seed {seed})", "tables": results}
 
 
 def handler(event, context):
     action = event.get("action", "setup")
+    # "bulk" (default) batches multi-row INSERTs; "row" keeps one INSERT per row.
+    mode = event.get("mode", "bulk")
 
     if action == "create_db":
         conn = get_connection("master")
@@ -76,6 +504,18 @@ def handler(event, context):
         conn.close()
         return {"status": "All 5 tables created"}
 
+    elif action == "add_row_version":
+        # Its own step so databases loaded before the column existed get it too. Lets the
+        # MCP server's report search find changed rows without hashing every blob.
+        conn = get_connection("BankABC")
+        cursor = conn.cursor()
+        cursor.execute("""
+            IF COL_LENGTH('research_reports', 'row_version') IS NULL
+            ALTER TABLE research_reports ADD row_version ROWVERSION
+        """)
+        conn.close()
+        return {"status": "research_reports.row_version in place"}
+
     elif action == "load_customers":
         conn = get_connection("BankABC")
         cursor = conn.cursor()
@@ -101,28 +541,30 @@ def handler(event, context):
             ('CUST019','Arabian Shipping Lines','Corporate','UAE','Logistics','Medium','Ahmed Al-Khalifa','2018-11-28','Verified',42000000),
             ('CUST020','Bahrain Tourism Authority','Government','Bahrain','Tourism','Low','Sara Al-Mannai','2019-05-10','Verified',18000000),
         ]
+        if mode == "bulk":
+            stats = bulk_insert(conn, "customers", CUSTOMER_COLUMNS, customers)
+            conn.close()
+            return {"status": f"{stats['rows']} customers inserted", "throughput": stats}
         for c in customers:
-            cursor.execute("INSERT INTO customers (customer_code,full_name,customer_type,country,sector,risk_rating,relationship_manager,onboarding_date,kyc_status,total_exposure_usd) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)", c)
+            cursor.execute(f"INSERT INTO customers ({','.join(CUSTOMER_COLUMNS)}) "
+                           f"VALUES ({','.join(['%s'] * len(CUSTOMER_COLUMNS))})", c)
         conn.close()
         return {"status": f"{len(customers)} customers inserted"}
 
     elif action == "load_financial":
         conn = get_connection("BankABC")
+        rows = _financial_rows(range(1, 21))
+        if mode == "bulk":
+            stats = bulk_insert(conn, "financial_data", FINANCIAL_COLUMNS, rows)
+            conn.close()
+            return {"status": f"{stats['rows']} financial records inserted", "throughput": stats}
         cursor = conn.cursor()
-        import random
-        random.seed(42)
-        ratings = ['AAA','AA','A','BBB','BB']
         count = 0
-        for cid in range(1, 21):
-            for q in ['Q1','Q2','Q3','Q4']:
-                cursor.execute(
-                    "INSERT INTO financial_data (customer_id,fiscal_year,fiscal_quarter,revenue_usd,net_income_usd,total_assets_usd,total_liabilities_usd,equity_usd,debt_to_equity_ratio,current_ratio,roe_pct,credit_rating,report_date) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
-                    (cid, 2025, q, random.randint(5000000,55000000), random.randint(500000,10500000),
-                     random.randint(50000000,550000000), random.randint(20000000,320000000),
-                     random.randint(10000000,210000000), round(random.random()*3,4),
-                     round(0.8+random.random()*2,4), round(random.random()*25,4),
-                     random.choice(ratings), f"2025-{['03','06','09','12'][['Q1','Q2','Q3','Q4'].index(q)]}-30"))
-                count += 1
+        for row in rows:
+            cursor.execute(
+                "INSERT INTO financial_data (customer_id,fiscal_year,fiscal_quarter,revenue_usd,net_income_usd,total_assets_usd,total_liabilities_usd,equity_usd,debt_to_equity_ratio,current_ratio,roe_pct,credit_rating,report_date) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                row)
+            count += 1
         conn.close()
         return {"status": f"{count} financial records inserted"}
 
@@ -141,8 +583,13 @@ def handler(event, context):
             ('Oil & Gas','Bahrain','2025-12-15',2.8,2.5,5.00,'Neutral',12.3,10.8,'Hold — production plateau','Reserve depletion, diversification need','NeoBank Research'),
             ('Financial Services','Bahrain','2025-12-15',4.5,1.6,5.00,'Positive',35.6,11.2,'Buy — fintech hub status growing','CBB regulation, competition from UAE','NeoBank Research'),
         ]
+        if mode == "bulk":
+            stats = bulk_insert(conn, "market_analysis", MARKET_COLUMNS, markets)
+            conn.close()
+            return {"status": f"{stats['rows']} market records inserted", "throughput": stats}
         for m in markets:
-            cursor.execute("INSERT INTO market_analysis (sector,region,analysis_date,gdp_growth_pct,inflation_rate_pct,interest_rate_pct,sector_outlook,market_cap_usd_bn,pe_ratio,analyst_recommendation,key_risks,source) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)", m)
+            cursor.execute(f"INSERT INTO market_analysis ({','.join(MARKET_COLUMNS)}) "
+                           f"VALUES ({','.join(['%s'] * len(MARKET_COLUMNS))})", m)
         conn.close()
         return {"status": f"{len(markets)} market records inserted"}
 
@@ -152,60 +599,65 @@ def handler(event, context):
         reports = [
             ('GCC Oil & Gas Sector Annual Review 2025','Market',None,'Oil & Gas','Dr. Ahmed Al-Khalifa','2025-12-01',
              'Comprehensive analysis of GCC oil and gas sector performance in 2025.',
-             b'%PDF-1.4 GCC Oil Gas Sector Review 2025. Executive Summary: The GCC oil and gas sector demonstrated resilience in 2025 despite global economic headwinds. Total sector revenue reached $850B, driven by stable crude prices averaging $78/barrel. Key findings: 1) Bahrain production steady at 200K bpd from Abu Saafa field. 2) Saudi Aramco downstream expansion on track. 3) UAE renewable energy investments exceeded $15B. 4) Qatar LNG expansion Phase 2 progressing. Risk factors include geopolitical tensions and energy transition acceleration. Recommendation: Overweight GCC energy sector.',
+             'GCC Oil Gas Sector Review 2025. Executive Summary: The GCC oil and gas sector demonstrated resilience in 2025 despite global economic headwinds. Total sector revenue reached $850B, driven by stable crude prices averaging $78/barrel. Key findings: 1) Bahrain production steady at 200K bpd from Abu Saafa field. 2) Saudi Aramco downstream expansion on track. 3) UAE renewable energy investments exceeded $15B. 4) Qatar LNG expansion Phase 2 progressing. Risk factors include geopolitical tensions and energy transition acceleration. Recommendation: Overweight GCC energy sector.',
              'application/pdf',45000,'Internal','oil,gas,gcc,annual,2025'),
             ('Credit Risk Assessment — Gulf Petrochemical','Credit',1,'Oil & Gas','Fatima Hassan','2025-11-15',
              'Credit risk assessment for Gulf Petrochemical Industries. Current exposure $45M.',
-             b'%PDF-1.4 Credit Risk Assessment Report. Borrower: Gulf Petrochemical Industries BSC. Facility: $45,000,000 revolving credit. Financial Highlights: Revenue $2.1B (up 8% YoY). EBITDA margin 22%. Net debt/EBITDA 2.8x. Current ratio 1.45. Interest coverage 4.2x. Credit Rating: BBB+ (stable). Key Strengths: Diversified product portfolio, strategic location. Key Risks: Feedstock price volatility. Recommendation: APPROVE renewal of $45M facility.',
+             'Credit Risk Assessment Report. Borrower: Gulf Petrochemical Industries BSC. Facility: $45,000,000 revolving credit. Financial Highlights: Revenue $2.1B (up 8% YoY). EBITDA margin 22%. Net debt/EBITDA 2.8x. Current ratio 1.45. Interest coverage 4.2x. Credit Rating: BBB+ (stable). Key Strengths: Diversified product portfolio, strategic location. Key Risks: Feedstock price volatility. Recommendation: APPROVE renewal of $45M facility.',
              'application/pdf',38000,'Confidential','credit,risk,petrochemical'),
             ('Bahrain Financial Services Regulatory Update Q4 2025','Regulatory',None,'Financial Services','Mohammed Al-Dosari','2025-12-20',
              'Central Bank of Bahrain regulatory updates for Q4 2025.',
-             b'%PDF-1.4 CBB Regulatory Update Q4 2025. 1. Open Banking Framework effective March 2026. 2. Enhanced AML/CFT requirements. 3. Digital Asset Custody regulations finalized. 4. Basel III.1 implementation January 2027. 5. Mandatory ESG reporting from FY2026. Impact: Moderate IT investment required.',
+             'CBB Regulatory Update Q4 2025. 1. Open Banking Framework effective March 2026. 2. Enhanced AML/CFT requirements. 3. Digital Asset Custody regulations finalized. 4. Basel III.1 implementation January 2027. 5. Mandatory ESG reporting from FY2026. Impact: Moderate IT investment required.',
              'application/pdf',52000,'Internal','regulatory,cbb,bahrain'),
             ('Al Baraka Banking Group Annual Credit Review','Annual',2,'Financial Services','Fatima Hassan','2025-10-30',
              'Annual credit review for Al Baraka Banking Group. Total exposure $120M.',
-             b'%PDF-1.4 Annual Credit Review. Client: Al Baraka Banking Group. Total Exposure: $120M. Total assets $28.5B (up 6%). Net profit $285M (up 12%). CAR 16.2%. NPL ratio 3.8%. ROE 11.5%. Recommendation: INCREASE facility to $150M.',
+             'Annual Credit Review. Client: Al Baraka Banking Group. Total Exposure: $120M. Total assets $28.5B (up 6%). Net profit $285M (up 12%). CAR 16.2%. NPL ratio 3.8%. ROE 11.5%. Recommendation: INCREASE facility to $150M.',
              'application/pdf',41000,'Confidential','credit,annual,islamic,banking'),
             ('GCC Real Estate Market Outlook 2026','Market',None,'Real Estate','Sara Al-Mannai','2025-12-10',
              'Forward-looking analysis of GCC real estate markets.',
-             b'%PDF-1.4 GCC Real Estate Outlook 2026. Market valued at $310B with projected 8% growth. Saudi mega-projects driving demand. Bahrain affordable housing initiative. UAE market stabilizing. Key Risks: Rising interest rates, oversupply in luxury segment.',
+             'GCC Real Estate Outlook 2026. Market valued at $310B with projected 8% growth. Saudi mega-projects driving demand. Bahrain affordable housing initiative. UAE market stabilizing. Key Risks: Rising interest rates, oversupply in luxury segment.',
              'application/pdf',48000,'Internal','real,estate,gcc,outlook'),
         ]
         for r in reports:
             vals = list(r)
-            blob = vals[7]
+            blob = _text_pdf(textwrap.wrap(vals[7], 90, break_on_hyphens=False))  # report body as a real PDF text stream
             vals[7] = None  # placeholder
             cursor.execute(
                 "INSERT INTO research_reports (title,report_type,customer_id,sector,author,publish_date,summary,report_content,content_type,file_size_bytes,classification,tags) "
                 "VALUES (%s,%s,%s,%s,%s,%s,%s,CONVERT(VARBINARY(MAX),%s),%s,%s,%s,%s)",
-                (vals[0],vals[1],vals[2],vals[3],vals[4],vals[5],vals[6],blob.decode('latin-1'),vals[8],vals[9],vals[10],vals[11]))
+                (vals[0],vals[1],vals[2],vals[3],vals[4],vals[5],vals[6],blob,vals[8],vals[9],vals[10],vals[11]))
 
         conn.close()
         return {"status": f"{len(reports)} research reports with blob data inserted"}
 
     elif action == "load_transactions":
-        conn = get_connection("BankABC")
+        # "count" scales the load well past the 1,200-row sample, e.g. millions in bulk mode.
+        conn = get_connection("BankABC", autocommit=mode != "bulk")
+        rows = _transaction_rows(int(event.get("count", 1200)))
+        if mode == "bulk":
+            stats = bulk_insert(conn, "transactions", TRANSACTION_COLUMNS, rows, row_sql=TRANSACTION_ROW_SQL,
+                                batch_size=int(event.get("batch_size", BULK_BATCH_SIZE)))
+            conn.close()
+            return {"status": f"{stats['rows']} transactions inserted", "throughput": stats}
         cursor = conn.cursor()
-        import random
-        random.seed(99)
-        types = ['Deposit','Withdrawal','Transfer','Loan','Payment','FX','Trade']
-        currencies = ['USD','BHD','SAR','AED']
-        counterparties = ['Citibank NY','HSBC London','Deutsche Bank','JP Morgan','Standard Chartered']
         count = 0
-        for i in range(1200):
-            cid = random.randint(1,20)
-            day_offset = random.randint(0,364)
+        for row in rows:
             cursor.execute(
-                "INSERT INTO transactions (customer_id,transaction_date,transaction_type,amount_usd,currency,counterparty,description,status,risk_flag) VALUES (%s,DATEADD(DAY,%s,'2025-01-01'),%s,%s,%s,%s,%s,%s,%s)",
-                (cid, day_offset, random.choice(types), random.randint(1000,5000000),
-                 random.choice(currencies), random.choice(counterparties),
-                 f'Banking transaction {i+1}',
-                 'Completed' if random.random()>0.05 else ('Pending' if random.random()>0.5 else 'Failed'),
-                 1 if random.random()<0.04 else 0))
+                "INSERT INTO transactions (customer_id,transaction_date,transaction_type,amount_usd,currency,counterparty,description,status,risk_flag) VALUES " + TRANSACTION_ROW_SQL,
+                row)
             count += 1
         conn.close()
         return {"status": f"{count} transactions inserted"}
 
+    elif action == "generate":
+        return generate(event)
+
+    elif action == "optimize":
+        return optimize(event)
+
+    elif action == "setup_all":
+        return setup_all(event)
+
     elif action == "verify":
         conn = get_connection("BankABC")
         cursor = conn.cursor()
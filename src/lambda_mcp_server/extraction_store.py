@@ -0,0 +1,113 @@
+"""Local store of text extracted from blob columns.
+
+Extractions are keyed on (table, column, row id) and stamped with the blob's
+SHA-256 (computed server-side with HASHBYTES) and a cheap row version (the row's
+ROWVERSION, or the blob's DATALENGTH where the table has none). Repeat questions
+about the same report are answered from one indexed SQLite lookup; once that
+record is due for re-checking, one indexed lookup of the row version confirms it,
+and the blob is only hashed again when the version has changed. The store lives
+under /tmp, inside the data region, and survives warm invocations of the MCP
+server Lambda.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+EXTRACTION_STORE_PATH = os.environ.get("EXTRACTION_STORE_PATH", "/tmp/blob_extractions.db")
+# How long a stored extraction is trusted before its row version is re-checked.
+EXTRACTION_VERIFY_SECONDS = float(os.environ.get("EXTRACTION_VERIFY_SECONDS", "300"))
+
+
+class ExtractionStore:
+    def __init__(self, path=EXTRACTION_STORE_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "writes": 0}
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                table_name TEXT NOT NULL, column_name TEXT NOT NULL, row_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL, content_type TEXT, size_bytes INTEGER,
+                text TEXT, page_offsets TEXT, metadata TEXT,
+                extracted_at REAL, verified_at REAL, version TEXT,
+                PRIMARY KEY (table_name, column_name, row_id))
+        """)
+        if "version" not in {row[1] for row in self._db.execute("PRAGMA table_info(extractions)")}:
+            self._db.execute("ALTER TABLE extractions ADD COLUMN version TEXT")  # store from an older build
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_extractions_hash ON extractions (content_hash)")
+        self._db.commit()
+
+    @staticmethod
+    def _row_to_record(row):
+        keys = ("table", "column", "row_id", "content_hash", "content_type", "size_bytes",
+                "text", "page_offsets", "metadata", "extracted_at", "verified_at", "version")
+        record = dict(zip(keys, row))
+        record["page_offsets"] = json.loads(record["page_offsets"] or "[]")
+        record["metadata"] = json.loads(record["metadata"] or "{}")
+        return record
+
+    def get(self, table, column, row_id, content_hash=None, version=None):
+        """Return the stored record.
+
+        With neither ``content_hash`` nor ``version`` only a recently verified record
+        is returned. Otherwise the record must match the row version or, failing
+        that, the content hash; a match is re-stamped as verified (and with
+        ``version``, so the next check needs no hash).
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM extractions WHERE table_name = ? AND column_name = ? AND row_id = ?",
+                (table, column, str(row_id)),
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            record = self._row_to_record(row)
+            if content_hash is None and version is None:
+                if time.time() - (record["verified_at"] or 0) > EXTRACTION_VERIFY_SECONDS:
+                    return None  # caller re-checks the row version against the database
+            elif version is not None and record["version"] == version:
+                self._verified(table, column, row_id, version)
+            elif content_hash is None:
+                return None  # version changed or unknown; caller fetches the hash
+            elif record["content_hash"] != content_hash:
+                self._stats["stale"] += 1
+                return None
+            else:
+                self._verified(table, column, row_id, version or record["version"])
+                record["version"] = version or record["version"]
+            self._stats["hits"] += 1
+            return record
+
+    def _verified(self, table, column, row_id, version):
+        self._db.execute(
+            "UPDATE extractions SET verified_at = ?, version = ? WHERE table_name = ? AND column_name = ? AND row_id = ?",
+            (time.time(), version, table, column, str(row_id)),
+        )
+        self._db.commit()
+
+    def hashes(self, table, column):
+        """{row_id: content_hash} for everything stored from one blob column."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT row_id, content_hash FROM extractions WHERE table_name = ? AND column_name = ?",
+                (table, column),
+            ).fetchall()
+        return dict(rows)
+
+    def put(self, table, column, row_id, content_hash, content_type, size_bytes, text,
+            page_offsets=None, metadata=None, version=None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (table, column, str(row_id), content_hash, content_type, size_bytes, text,
+                 json.dumps(page_offsets or []), json.dumps(metadata or {}, default=str), now, now, version),
+            )
+            self._db.commit()
+            self._stats["writes"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,74 @@
+"""Job records for asynchronous tool calls.
+
+A submitted job is recorded as one JSON object in ``JOB_BUCKET``, an S3 bucket in
+the data region, then run by an Event-type invocation of the job function (the MCP
+server deployed with a longer timeout), which writes the status and result back
+to the same object. Results therefore never
+leave me-south-1; the agent polls for them with ``get_job_result``.
+"""
+import json
+import os
+import re
+import uuid
+
+import boto3
+from botocore.exceptions import ClientError
+
+JOB_BUCKET = os.environ.get("JOB_BUCKET", "")
+JOB_PREFIX = os.environ.get("JOB_PREFIX", "jobs/")
+JOB_REGION = os.environ.get("JOB_REGION", os.environ.get("AWS_REGION", "me-south-1"))
+
+_JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobStore:
+    def __init__(self, bucket=JOB_BUCKET, prefix=JOB_PREFIX, region_name=JOB_REGION):
+        self._bucket = bucket
+        self._prefix = prefix
+        self._region_name = region_name
+        self._client = None
+        self._stats = {"reads": 0, "writes": 0, "not_found": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._bucket)
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def valid_id(job_id) -> bool:
+        return isinstance(job_id, str) and bool(_JOB_ID_RE.match(job_id))
+
+    def _s3(self):
+        if self._client is None:
+            self._client = boto3.client("s3", region_name=self._region_name)
+        return self._client
+
+    def put(self, job_id, record):
+        self._s3().put_object(
+            Bucket=self._bucket, Key=f"{self._prefix}{job_id}.json",
+            Body=json.dumps(record, default=str).encode(),
+            ContentType="application/json", ServerSideEncryption="AES256",
+        )
+        self._stats["writes"] += 1
+
+    def get(self, job_id):
+        """Return the job record, or None if no such job exists.
+
+        S3 reports a missing key as NoSuchKey (404) only to callers that may list
+        the bucket, so the role needs s3:ListBucket on ``JOB_BUCKET``.
+        """
+        try:
+            obj = self._s3().get_object(Bucket=self._bucket, Key=f"{self._prefix}{job_id}.json")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                raise
+            self._stats["not_found"] += 1
+            return None
+        self._stats["reads"] += 1
+        return json.loads(obj["Body"].read())
+
+    def stats(self):
+        return dict(self._stats)
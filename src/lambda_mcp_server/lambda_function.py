@@ -1,165 +1,1109 @@
 """
 NeoBank MVP — Lambda MCP Server for MSSQL Tools.
 Invoked by AgentCore Gateway (eu-west-1) via cross-region Lambda invoke.
-Tools: execute_sql_query, get_schema_info, analyze_blob_data
+Tools: execute_sql_query, get_schema_info, analyze_blob_data, search_research_reports, run_query_plan,
+batch, submit_job, get_job_result
 """
+import base64
+import codecs
+import decimal
+import gzip
+import hashlib
 import json
 import os
+import re
 import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+
 import boto3
 import pymssql
 
+from extraction_store import ExtractionStore
+from job_store import JobStore
+from pdf_text import PdfTextExtractor
+from report_search import ReportIndex
+from result_cache import ResultCache, from_sources, normalize_sql, referenced_tables, ttl_for
+from secrets_cache import get_secret_cache
+
+POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "4"))
+POOL_MAX_IDLE_SECONDS = float(os.environ.get("DB_POOL_MAX_IDLE_SECONDS", "300"))
+MAX_ROWS = 500
+FETCH_BATCH_SIZE = int(os.environ.get("FETCH_BATCH_SIZE", "100"))
+# Columns that are unique within every NeoBank table, so paging a single-table query
+# on them never skips rows.
+KEYSET_COLUMNS = {"id"}
+SCHEMA_CACHE_CHECK_SECONDS = float(os.environ.get("SCHEMA_CACHE_CHECK_SECONDS", "60"))
+BATCH_MAX_CALLS = int(os.environ.get("BATCH_MAX_CALLS", "20"))
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", str(POOL_MAX_SIZE)))
+BATCH_CALL_TIMEOUT_SECONDS = float(os.environ.get("BATCH_CALL_TIMEOUT_SECONDS", "25"))
+DB_QUERY_TIMEOUT_SECONDS = int(os.environ.get("DB_QUERY_TIMEOUT_SECONDS", "30"))
+TOOL_DELIMITER = "___"
+PREVIEW_MAX_CHARS = 2000
+BLOB_HEAD_BYTES = 16  # enough for content-type magic bytes
+BLOB_CHUNK_BYTES = int(os.environ.get("BLOB_CHUNK_BYTES", str(256 * 1024)))
+EXTRACTION_MAX_CHARS = int(os.environ.get("EXTRACTION_MAX_CHARS", "100000"))
+REPORT_INDEX_SYNC_SECONDS = float(os.environ.get("REPORT_INDEX_SYNC_SECONDS", "60"))
+# Blob extractions one search may trigger; the rest are picked up by later searches.
+REPORT_INDEX_SYNC_MAX_EXTRACTIONS = int(os.environ.get("REPORT_INDEX_SYNC_MAX_EXTRACTIONS", "10"))
+PLAN_MAX_STEPS = int(os.environ.get("PLAN_MAX_STEPS", "10"))
+PLAN_SAMPLE_ROWS = 5
+# Responses at least this large are gzipped for the proxy hop when the proxy asks for it.
+ENVELOPE_MIN_BYTES = int(os.environ.get("ENVELOPE_MIN_BYTES", "1024"))
+# Async jobs are run by an Event invoke of the job function (see job_store): the same
+# code deployed with a longer timeout. JOB_TIMEOUT_SECONDS is that timeout, used for a
+# job's deadline when the invocation context cannot report its remaining time.
+JOB_FUNCTION_NAME = os.environ.get("JOB_FUNCTION_NAME", os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "neobank-mcp-server"))
+JOB_TIMEOUT_SECONDS = float(os.environ.get("JOB_TIMEOUT_SECONDS", "900"))
+
 
 def get_db_connection():
-    """Get MSSQL connection using credentials from Secrets Manager."""
-    sm = boto3.client("secretsmanager", region_name="me-south-1")
-    secret = json.loads(sm.get_secret_value(SecretId=os.environ["SECRET_ARN"])["SecretString"])
-    return pymssql.connect(
-        server=os.environ["DB_HOST"],
-        port=int(secret.get("port", 1433)),
-        user=secret["username"],
-        password=secret["password"],
-        database=os.environ.get("DB_NAME", "BankABC"),
-        as_dict=True,
-    )
-
-
-def execute_sql_query(query: str, parameters: dict = None) -> dict:
-    """Execute parameterized SQL query on MSSQL read replica."""
+    """Get MSSQL connection using cached credentials from Secrets Manager."""
+    def connect(secret):
+        return pymssql.connect(
+            server=os.environ["DB_HOST"],
+            port=int(secret.get("port", 1433)),
+            user=secret["username"],
+            password=secret["password"],
+            database=os.environ.get("DB_NAME", "BankABC"),
+            as_dict=True,
+            timeout=DB_QUERY_TIMEOUT_SECONDS,
+        )
+    return get_secret_cache().connect(connect)
+
+
+class ConnectionPool:
+    """Module-level MSSQL connection pool that survives warm Lambda invocations.
+
+    Idle connections are pinged with ``SELECT 1`` before being handed out and
+    are discarded (and replaced) when the ping fails or they have been idle
+    longer than ``max_idle``.
+    """
+
+    def __init__(self, factory, max_size=POOL_MAX_SIZE, max_idle=POOL_MAX_IDLE_SECONDS):
+        self._factory = factory
+        self._max_size = max_size
+        self._max_idle = max_idle
+        self._idle = []  # [(conn, released_at)], most recently released last
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {"hits": 0, "misses": 0, "reconnects": 0, "expired": 0, "discarded": 0}
+
+    def _bump(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Return a live connection, reusing an idle one when possible."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, released_at = self._idle.pop()
+            if time.monotonic() - released_at > self._max_idle:
+                self._bump("expired")
+                self._close(conn)
+                continue
+            if self._is_alive(conn):
+                self._bump("hits")
+                return conn
+            self._bump("reconnects")
+            self._close(conn)
+            return self._factory()
+        self._bump("misses")
+        return self._factory()
+
+    def release(self, conn, broken=False):
+        """Return a connection to the pool, or close it if broken or the pool is full."""
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        with self._lock:
+            if not broken and len(self._idle) < self._max_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+            self._stats["discarded"] += 1
+        self._close(conn)
+
+    @contextmanager
+    def connection(self):
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            try:
+                yield pinned
+            except (pymssql.OperationalError, pymssql.InterfaceError):
+                self._local.conn = None  # unpin; pinned() discards it on exit
+                raise
+            return
+        conn = self.acquire()
+        try:
+            yield conn
+        except (pymssql.OperationalError, pymssql.InterfaceError):
+            self.release(conn, broken=True)
+            raise
+        except Exception:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    @contextmanager
+    def pinned(self):
+        """Route every ``connection()`` on this thread to one pooled connection."""
+        if getattr(self._local, "conn", None) is not None:
+            yield
+            return
+        conn = self.acquire()
+        self._local.conn = conn
+        try:
+            yield
+        finally:
+            broken = self._local.conn is not conn
+            self._local.conn = None
+            self.release(conn, broken=broken)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, idle=len(self._idle), max_size=self._max_size)
+
+
+_pool = ConnectionPool(get_db_connection)
+
+
+_ORDER_BY_RE = re.compile(r"\s+ORDER\s+BY\s+\[?(\w+)\]?(?:\s+(ASC|DESC))?\s*$", re.IGNORECASE)
+_TOP_RE = re.compile(r"^\s*SELECT\s+(?:DISTINCT\s+)?TOP\b", re.IGNORECASE)
+# A trailing top-level ORDER BY (no parentheses after it), without its own OFFSET.
+_TRAILING_ORDER_BY_RE = re.compile(r"\bORDER\s+BY\s+(?:(?!\bOFFSET\b)[^()])*$", re.IGNORECASE)
+# Constructs after which the ORDER BY column may repeat across result rows.
+_NON_KEYSET_RE = re.compile(r"\b(?:join|group\s+by|distinct|union|intersect|except|apply)\b")
+
+
+def _clean_row(row: dict) -> dict:
+    """Convert non-serializable column values."""
+    clean_row = {}
+    for k, v in row.items():
+        if isinstance(v, (bytes, bytearray)):
+            clean_row[k] = f"<BLOB {len(v)} bytes>"
+        elif hasattr(v, "isoformat"):
+            clean_row[k] = v.isoformat()
+        else:
+            clean_row[k] = v
+    return clean_row
+
+
+# pymssql DB-API type codes -> column type names used by the columnar format
+_PYMSSQL_TYPES = {1: "string", 2: "binary", 3: "number", 4: "datetime", 5: "decimal"}
+
+
+def _to_columnar(result: dict) -> dict:
+    """Re-shape a row-dict page into column names once plus one typed array per column."""
+    columns = result.get("_columns") or [[k, "string"] for k in (result["rows"][0] if result["rows"] else {})]
+    data = []
+    for i, (name, col_type) in enumerate(columns):
+        values = [row.get(name, row.get(i)) for row in result["rows"]]
+        if col_type == "decimal":
+            values = [float(v) if isinstance(v, (decimal.Decimal, str)) else v for v in values]
+        data.append(values)
+    columnar = {k: v for k, v in result.items() if k not in ("rows", "_columns")}
+    columnar.update(format="columnar", columns=[c[0] for c in columns], types=[c[1] for c in columns], data=data)
+    return columnar
+
+
+def _compress(payload: dict) -> dict:
+    raw = json.dumps(payload, default=str, separators=(",", ":")).encode()
+    packed = gzip.compress(raw)
+    return {
+        "format": payload.get("format", "rows"),
+        "encoding": "gzip+base64",
+        "uncompressed_bytes": len(raw),
+        "compressed_bytes": len(packed),
+        "payload": base64.b64encode(packed).decode(),
+    }
+
+
+def _query_fingerprint(query: str, parameters: dict) -> str:
+    raw = json.dumps([normalize_sql(query), parameters or {}], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def _encode_token(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, default=str).encode()).decode()
+
+
+def _decode_token(token: str) -> dict:
+    """Decode a continuation token; ValueError unless it has the shape ``_encode_token`` gives it."""
+    state = json.loads(base64.urlsafe_b64decode(token.encode()))
+    if not isinstance(state, dict) or not isinstance(state.get("fp"), str):
+        raise ValueError("not a continuation token")
+    if "after" in state:
+        if isinstance(state["after"], (dict, list)):
+            raise ValueError("bad keyset position")
+    elif type(state.get("offset")) is not int or state["offset"] < 0:
+        raise ValueError("bad offset")
+    return state
+
+
+def _keyset_plan(query: str):
+    """Return (column, descending, inner_query) when the query can be keyset-paged.
+
+    Only single-table queries (no JOIN, comma join, GROUP BY, DISTINCT or subquery)
+    ending in ``ORDER BY <unique column>`` qualify; elsewhere the column can repeat
+    across rows and ``WHERE id > last`` would drop some. Without TOP the ORDER BY is moved
+    to the outer query; with TOP it must stay inside so the page walks the same
+    top-N set.
+    """
+    match = _ORDER_BY_RE.search(query)
+    if not match or match.group(1).lower() not in KEYSET_COLUMNS:
+        return None
+    normalized = normalize_sql(query)
+    if (_NON_KEYSET_RE.search(normalized) or len(re.findall(r"\bselect\b", normalized)) != 1
+            or len(referenced_tables(normalized)) != 1 or len(from_sources(normalized)) != 1):
+        return None
+    descending = (match.group(2) or "").upper() == "DESC"
+    inner = query if _TOP_RE.match(query) else query[:match.start()]
+    return match.group(1), descending, inner
+
+
+_result_cache = ResultCache()
+
+
+def execute_sql_query(query: str, parameters: dict = None, page_size: int = MAX_ROWS,
+                      continuation_token: str = None, use_cache: bool = True,
+                      format: str = "rows", compress: bool = False) -> dict:
+    """Execute parameterized SQL query on MSSQL read replica.
+
+    Results are served from the query result cache when the same normalized SQL,
+    parameters and page were fetched within the TTL of the tables it reads.
+    ``format="columnar"`` lists column names once with one typed array per column;
+    ``compress`` gzips the response into a base64 payload for programmatic clients.
+    """
+    if format not in ("rows", "columnar"):
+        return {"error": f"Unknown format: {format}. Use 'rows' or 'columnar'."}
+
     blocked = ["DROP", "DELETE", "TRUNCATE", "ALTER", "CREATE", "INSERT", "UPDATE", "EXEC", "EXECUTE"]
     upper = query.upper().strip()
     for kw in blocked:
         if upper.startswith(kw):
             return {"error": f"Blocked: {kw} statements not allowed. Read-only access."}
 
-    conn = get_db_connection()
-    try:
+    normalized = normalize_sql(query)
+    key = ResultCache.make_key(normalized, parameters or {}, page_size, continuation_token)
+    if use_cache:
+        result = _result_cache.get(key)
+        if result is not None:
+            return _shape_result(result, format, compress, cached=True)
+
+    result = _execute_page(query, parameters, page_size, continuation_token)
+    if "error" in result:
+        return result
+    if use_cache:
+        _result_cache.put(key, result, ttl_for(normalized))
+    return _shape_result(result, format, compress, cached=False)
+
+
+def _shape_result(result: dict, format: str, compress: bool, cached: bool) -> dict:
+    if format == "columnar":
+        shaped = _to_columnar(result)
+    else:
+        shaped = {k: v for k, v in result.items() if k != "_columns"}
+    shaped["cached"] = cached
+    return _compress(shaped) if compress else shaped
+
+
+def _execute_page(query: str, parameters: dict, page_size: int, continuation_token: str) -> dict:
+    """Run one page of a query.
+
+    Rows are streamed with ``fetchmany`` and reading stops once the page is full.
+    When more rows remain, ``continuation_token`` resumes the same query: by keyset
+    (``WHERE id > last``) for single-table queries ordered by ``id``, by
+    ``OFFSET ... FETCH`` for other queries ending in ORDER BY, and otherwise by
+    skipping the rows already returned.
+    """
+    query = query.strip().rstrip(";")
+    page_size = max(1, min(int(page_size or MAX_ROWS), MAX_ROWS))
+    args = tuple(parameters.values()) if parameters else ()
+    fingerprint = _query_fingerprint(query, parameters)
+    state = {}
+    if continuation_token:
+        try:
+            state = _decode_token(continuation_token)
+        except ValueError:
+            return {"error": "Invalid continuation_token"}
+        if state.get("fp") != fingerprint:
+            return {"error": "continuation_token does not belong to this query and parameters"}
+
+    keyset = _keyset_plan(query)
+    sql, skip = query, 0
+    if keyset and "after" in state:
+        column, descending, inner = keyset
+        if not args:
+            inner = inner.replace("%", "%%")  # the query is about to be parameterized
+        sql = (f"SELECT * FROM ({inner}) AS _page WHERE [{column}] {'<' if descending else '>'} %s "
+               f"ORDER BY [{column}] {'DESC' if descending else 'ASC'}")
+        args = args + (state["after"],)
+    else:
+        skip = int(state.get("offset", 0))
+        if skip and not _TOP_RE.match(query) and _TRAILING_ORDER_BY_RE.search(query):
+            # Let the server skip the rows instead of streaming them here to discard.
+            sql = (query if args else query.replace("%", "%%")) + " OFFSET %s ROWS FETCH NEXT %s ROWS ONLY"
+            args = args + (skip, page_size + 1)
+            skip = 0
+
+    with _pool.connection() as conn:
         cursor = conn.cursor()
-        if parameters:
-            cursor.execute(query, tuple(parameters.values()))
+        if args:
+            cursor.execute(sql, args)
         else:
-            cursor.execute(query)
-        rows = cursor.fetchall()
-        # Convert non-serializable types
-        clean = []
-        for row in rows[:500]:  # Limit to 500 rows
-            clean_row = {}
-            for k, v in row.items():
-                if isinstance(v, (bytes, bytearray)):
-                    clean_row[k] = f"<BLOB {len(v)} bytes>"
-                elif hasattr(v, "isoformat"):
-                    clean_row[k] = v.isoformat()
-                else:
-                    clean_row[k] = v
-            clean.append(clean_row)
-        return {"row_count": len(rows), "rows": clean, "truncated": len(rows) > 500}
-    finally:
-        conn.close()
+            cursor.execute(sql)
+        while skip > 0:
+            batch = cursor.fetchmany(min(skip, FETCH_BATCH_SIZE))
+            if not batch:
+                break
+            skip -= len(batch)
+        rows = []
+        # Read one row past the page to learn whether more remain; the pool
+        # cancels whatever is left of the result set when the connection is released.
+        while len(rows) <= page_size:
+            batch = cursor.fetchmany(min(FETCH_BATCH_SIZE, page_size + 1 - len(rows)))
+            if not batch:
+                break
+            rows.extend(batch)
+        description = cursor.description or ()
 
+    has_more = len(rows) > page_size
+    clean = [_clean_row(row) for row in rows[:page_size]]
+    result = {"row_count": len(clean), "rows": clean, "truncated": has_more,
+              "_columns": [[d[0] or str(i), _PYMSSQL_TYPES.get(d[1], "string")] for i, d in enumerate(description)]}
+    if has_more:
+        last = {k.lower(): v for k, v in clean[-1].items()}
+        names = [(d[0] or "").lower() for d in description]
+        # The keyset wrapper selects * from a derived table, which needs every column named once.
+        named = all(names) and len(set(names)) == len(names)
+        if keyset and named and keyset[0].lower() in last:
+            next_state = {"fp": fingerprint, "after": last[keyset[0].lower()]}
+            result["pagination"] = "keyset"
+        else:
+            next_state = {"fp": fingerprint, "offset": int(state.get("offset", 0)) + len(clean)}
+            result["pagination"] = "offset"
+        result["continuation_token"] = _encode_token(next_state)
+    return result
 
-def get_schema_info(database_name: str = None, table_name: str = None) -> dict:
-    """Retrieve database schema, tables, columns, and relationships."""
-    conn = get_db_connection()
-    try:
+
+_SCHEMA_VERSION_SQL = """
+    SELECT COUNT(*) AS object_count, MAX(modify_date) AS last_modified
+    FROM sys.objects WHERE type IN ('U', 'PK', 'F')
+"""
+
+# One batch, one round trip: version, tables, columns, primary keys, foreign keys.
+_SCHEMA_SNAPSHOT_SQL = _SCHEMA_VERSION_SQL + """;
+    SELECT TABLE_NAME, TABLE_TYPE
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_TYPE = 'BASE TABLE'
+    ORDER BY TABLE_NAME;
+
+    SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH,
+           c.IS_NULLABLE, c.COLUMN_DEFAULT
+    FROM INFORMATION_SCHEMA.COLUMNS c
+    JOIN INFORMATION_SCHEMA.TABLES t
+      ON t.TABLE_NAME = c.TABLE_NAME AND t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_TYPE = 'BASE TABLE'
+    ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION;
+
+    SELECT k.TABLE_NAME, k.COLUMN_NAME
+    FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+      ON k.CONSTRAINT_NAME = tc.CONSTRAINT_NAME AND k.TABLE_NAME = tc.TABLE_NAME
+    WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+    ORDER BY k.TABLE_NAME, k.ORDINAL_POSITION;
+
+    SELECT OBJECT_NAME(fkc.parent_object_id) AS TABLE_NAME,
+           COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS COLUMN_NAME,
+           OBJECT_NAME(fkc.referenced_object_id) AS REFERENCED_TABLE,
+           COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) AS REFERENCED_COLUMN
+    FROM sys.foreign_key_columns fkc
+    ORDER BY TABLE_NAME, COLUMN_NAME
+"""
+
+_schema_cache = {"version": None, "snapshot": None, "checked_at": 0.0, "hits": 0, "misses": 0}
+_schema_lock = threading.Lock()
+
+
+def _schema_version(row: dict) -> str:
+    return f"{row['object_count']}:{row['last_modified']}"
+
+
+def _load_schema_snapshot(cursor) -> dict:
+    """Run the snapshot batch and fold the result sets into {table: {...}}."""
+    cursor.execute(_SCHEMA_SNAPSHOT_SQL)
+    result_sets = [cursor.fetchall()]
+    while cursor.nextset():
+        result_sets.append(cursor.fetchall())
+    version_rows, tables, columns, pks, fks = result_sets
+
+    snapshot = {t["TABLE_NAME"]: {"table_type": t["TABLE_TYPE"], "columns": [], "primary_keys": [], "foreign_keys": []}
+                for t in tables}
+    for c in columns:
+        table = snapshot.get(c.pop("TABLE_NAME"))
+        if table is not None:
+            table["columns"].append(c)
+    for pk in pks:
+        if pk["TABLE_NAME"] in snapshot:
+            snapshot[pk["TABLE_NAME"]]["primary_keys"].append(pk["COLUMN_NAME"])
+    for fk in fks:
+        if fk["TABLE_NAME"] in snapshot:
+            snapshot[fk["TABLE_NAME"]]["foreign_keys"].append({
+                "column": fk["COLUMN_NAME"],
+                "references_table": fk["REFERENCED_TABLE"],
+                "references_column": fk["REFERENCED_COLUMN"],
+            })
+    return {"version": _schema_version(version_rows[0]), "tables": snapshot}
+
+
+def _get_schema_snapshot() -> dict:
+    """Return the memoized schema snapshot, revalidated against sys.objects.
+
+    Within ``SCHEMA_CACHE_CHECK_SECONDS`` of the last check the snapshot is served
+    without touching the database; after that a single cheap version query decides
+    whether the full snapshot must be reloaded.
+    """
+    with _schema_lock:
+        cached = _schema_cache["snapshot"]
+        if cached and time.monotonic() - _schema_cache["checked_at"] < SCHEMA_CACHE_CHECK_SECONDS:
+            _schema_cache["hits"] += 1
+            return cached
+
+    with _pool.connection() as conn:
         cursor = conn.cursor()
-        if table_name:
-            cursor.execute("""
-                SELECT c.COLUMN_NAME, c.DATA_TYPE, c.CHARACTER_MAXIMUM_LENGTH,
-                       c.IS_NULLABLE, c.COLUMN_DEFAULT
-                FROM INFORMATION_SCHEMA.COLUMNS c
-                WHERE c.TABLE_NAME = %s
-                ORDER BY c.ORDINAL_POSITION
-            """, (table_name,))
-            columns = cursor.fetchall()
-            # Get primary keys
-            cursor.execute("""
-                SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-                WHERE TABLE_NAME = %s AND CONSTRAINT_NAME LIKE 'PK_%'
-            """, (table_name,))
-            pks = [r["COLUMN_NAME"] for r in cursor.fetchall()]
-            return {"table": table_name, "columns": columns, "primary_keys": pks}
-        else:
-            cursor.execute("""
-                SELECT TABLE_NAME, TABLE_TYPE
-                FROM INFORMATION_SCHEMA.TABLES
-                WHERE TABLE_TYPE = 'BASE TABLE'
-                ORDER BY TABLE_NAME
-            """)
-            return {"tables": cursor.fetchall()}
-    finally:
-        conn.close()
+        if cached:
+            cursor.execute(_SCHEMA_VERSION_SQL)
+            if _schema_version(cursor.fetchone()) == cached["version"]:
+                with _schema_lock:
+                    _schema_cache["checked_at"] = time.monotonic()
+                    _schema_cache["hits"] += 1
+                return cached
+        snapshot = _load_schema_snapshot(cursor)
+
+    with _schema_lock:
+        _schema_cache.update(snapshot=snapshot, version=snapshot["version"], checked_at=time.monotonic())
+        _schema_cache["misses"] += 1
+    return snapshot
+
+
+def get_schema_info(database_name: str = None, table_name: str = None, include_columns: bool = False) -> dict:
+    """Retrieve database schema, tables, columns, and relationships.
+
+    All modes are served from an in-process snapshot. ``include_columns`` returns
+    every table with its columns, primary keys and foreign keys in one call.
+    """
+    tables = _get_schema_snapshot()["tables"]
+    if table_name:
+        match = next((name for name in tables if name.lower() == table_name.lower()), None)
+        if match is None:
+            return {"table": table_name, "columns": [], "primary_keys": [], "foreign_keys": []}
+        info = tables[match]
+        return {"table": match, "columns": info["columns"], "primary_keys": info["primary_keys"],
+                "foreign_keys": info["foreign_keys"]}
+    if include_columns:
+        return {"tables": [{"TABLE_NAME": name, **{k: v for k, v in info.items() if k != "table_type"}}
+                           for name, info in tables.items()]}
+    return {"tables": [{"TABLE_NAME": name, "TABLE_TYPE": info["table_type"]} for name, info in tables.items()]}
+
+
+# table -> whether it has a row_version (ROWVERSION) column; checked once per process.
+_row_version_tables = {}
+
+
+class BlobReader:
+    """Reads one VARBINARY(MAX) value in ranges with SUBSTRING instead of fetching it whole.
+
+    Names must already be validated; ``version()`` fetches a cheap change stamp,
+    ``open()`` fetches the size, hash and header bytes in one round trip, and
+    ``chunks()`` pulls further ranges only as they are consumed.
+    """
+
+    def __init__(self, cursor, table: str, blob_column: str, id_column: str, row_id):
+        self._cursor = cursor
+        self._source = f"FROM [{table}] WHERE [{id_column}] = %s"
+        self._table = table
+        self._column = blob_column
+        self._row_id = row_id
+        self.size = 0
+        self.content_hash = None
+        self.bytes_read = 0
+        self.chunks_read = 0
+
+    def version(self):
+        """Return the row's ROWVERSION, or the blob's DATALENGTH where the table has none.
+
+        Unlike ``open()`` this never reads the blob, so it costs one indexed lookup.
+        None when the row or blob does not exist.
+        """
+        if self._table not in _row_version_tables:
+            self._cursor.execute("SELECT COL_LENGTH(%s, 'row_version')", (self._table,))
+            row = self._cursor.fetchone()
+            _row_version_tables[self._table] = bool(row and row[0])
+        stamp = ("CONVERT(VARCHAR(20), CONVERT(BIGINT, [row_version]))" if _row_version_tables[self._table]
+                 else "NULL")
+        self._cursor.execute(f"SELECT DATALENGTH([{self._column}]), {stamp} {self._source}", (self._row_id,))
+        row = self._cursor.fetchone()
+        if not row or not row[0]:
+            return None
+        self.size = row[0]
+        return f"rv:{row[1]}" if row[1] is not None else f"len:{row[0]}"
+
+    def open(self, head_bytes: int = BLOB_HEAD_BYTES) -> bytes:
+        """Fetch size, SHA-256 (hashed server-side) and header bytes in one round trip."""
+        self._cursor.execute(
+            f"SELECT DATALENGTH([{self._column}]), SUBSTRING([{self._column}], 1, %s), "
+            f"HASHBYTES('SHA2_256', [{self._column}]) {self._source}",
+            (head_bytes, self._row_id),
+        )
+        row = self._cursor.fetchone()
+        if not row or not row[0]:
+            return b""
+        self.size = row[0]
+        self.content_hash = bytes(row[2]).hex() if row[2] else None
+        self.bytes_read += len(row[1])
+        return bytes(row[1])
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Read ``size`` bytes starting at 0-based ``offset``."""
+        if offset >= self.size or size <= 0:
+            return b""
+        self._cursor.execute(
+            f"SELECT SUBSTRING([{self._column}], %s, %s) {self._source}",
+            (offset + 1, size, self._row_id),
+        )
+        row = self._cursor.fetchone()
+        data = bytes(row[0]) if row and row[0] else b""
+        self.bytes_read += len(data)
+        self.chunks_read += 1
+        return data
+
+    def chunks(self, offset: int = 0, chunk_size: int = BLOB_CHUNK_BYTES):
+        while offset < self.size:
+            data = self.read(offset, chunk_size)
+            if not data:
+                return
+            offset += len(data)
+            yield data
+
+
+def _extract_blob(reader: BlobReader, head: bytes, max_chars: int = EXTRACTION_MAX_CHARS) -> dict:
+    """Sniff the content type from ``head`` and extract up to ``max_chars`` of text."""
+    # Detect content type from magic bytes
+    page_offsets = []
+    metadata = {}
+    if head[:4] == b"%PDF":
+        content_type = "application/pdf"
+        extractor = PdfTextExtractor(max_chars=max_chars)
+        if not extractor.feed(head):
+            for chunk in reader.chunks(len(head)):
+                if extractor.feed(chunk):
+                    break
+        text = extractor.close().text
+        page_offsets = extractor.page_offsets
+        metadata = dict(extractor.stats, bytes_read=reader.bytes_read, chunks_read=reader.chunks_read)
+    elif head[:2] == b"PK":
+        content_type = "application/vnd.openxmlformats (docx/xlsx)"
+        text = f"Office document, {reader.size} bytes"
+    else:
+        content_type = "application/octet-stream"
+        # UTF-8 needs at most 4 bytes per character.
+        prefix = head + reader.read(len(head), 4 * max_chars - len(head))
+        try:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            text = decoder.decode(prefix, final=len(prefix) >= reader.size)[:max_chars]
+        except UnicodeDecodeError:
+            text = f"Binary data, {reader.size} bytes, first 100 hex: {prefix[:100].hex()}"
+    return {"content_type": content_type, "size_bytes": reader.size, "text": text,
+            "page_offsets": page_offsets, "metadata": metadata}
+
+
+_extraction_store = ExtractionStore()
+
+
+def _store_extraction(table: str, blob_column: str, row_key: str, reader: BlobReader, head: bytes,
+                      version: str = None) -> dict:
+    extracted = _extract_blob(reader, head)
+    _extraction_store.put(table, blob_column, row_key, reader.content_hash or "", extracted["content_type"],
+                          extracted["size_bytes"], extracted["text"], extracted["page_offsets"],
+                          extracted["metadata"], version)
+    return extracted
 
 
 def analyze_blob_data(table: str, blob_column: str, row_id: int, id_column: str = "id") -> dict:
-    """Extract and analyze unstructured data from blob columns."""
+    """Extract and analyze unstructured data from blob columns.
+
+    Extracted text is kept in the local extraction store keyed on the blob's content
+    hash, so repeat questions are one indexed lookup. A stored extraction due for
+    re-checking is confirmed by the row version (one indexed lookup); the blob is
+    hashed again only when that has changed. On a miss the blob is never loaded
+    whole: only its header is fetched for content-type sniffing, and further ranges
+    are streamed until the extraction budget is reached.
+    """
     # Validate table/column names (prevent injection)
     if not all(c.isalnum() or c == "_" for c in table + blob_column + id_column):
         return {"error": "Invalid table/column name"}
 
-    conn = get_db_connection()
-    try:
+    row_key = f"{id_column}={row_id}"
+    record = _extraction_store.get(table, blob_column, row_key)
+    from_store = True
+    if record is None:
+        with _pool.connection() as conn:
+            reader = BlobReader(conn.cursor(as_dict=False), table, blob_column, id_column, row_id)
+            version = reader.version()
+            if version is None:
+                return {"error": f"No blob data found for {id_column}={row_id}"}
+            record = _extraction_store.get(table, blob_column, row_key, version=version)
+            if record is None:
+                head = reader.open()
+                if not head:
+                    return {"error": f"No blob data found for {id_column}={row_id}"}
+                record = _extraction_store.get(table, blob_column, row_key, reader.content_hash or "", version)
+                from_store = record is not None
+                if record is None:
+                    record = _store_extraction(table, blob_column, row_key, reader, head, version)
+
+    result = {
+        "row_id": row_id,
+        "content_type": record["content_type"],
+        "size_bytes": record["size_bytes"],
+        "preview": record["text"][:PREVIEW_MAX_CHARS],
+        "from_store": from_store,
+    }
+    if record["metadata"]:
+        result["extraction"] = dict(record["metadata"], text_chars=len(record["text"]),
+                                    page_offsets=record["page_offsets"])
+    return result
+
+
+def backfill_blob_extractions(table: str = "research_reports", blob_column: str = "report_content",
+                              id_column: str = "id", limit: int = 50) -> dict:
+    """Pre-extract blobs whose content hash is not yet in the extraction store."""
+    if not all(c.isalnum() or c == "_" for c in table + blob_column + id_column):
+        return {"error": "Invalid table/column name"}
+
+    stored = _extraction_store.hashes(table, blob_column)
+    extracted, failed = 0, []
+    with _pool.connection() as conn:
         cursor = conn.cursor(as_dict=False)
-        cursor.execute(f"SELECT [{blob_column}] FROM [{table}] WHERE [{id_column}] = %s", (row_id,))
-        row = cursor.fetchone()
-        if not row or not row[0]:
-            return {"error": f"No blob data found for {id_column}={row_id}"}
-
-        blob = row[0]
-        # Detect content type from magic bytes
-        content_type = "unknown"
-        preview = ""
-        if blob[:4] == b"%PDF":
-            content_type = "application/pdf"
-            # Extract text between stream markers (simplified)
-            text = blob.decode("latin-1", errors="ignore")
-            # Find readable text segments
-            segments = []
-            for chunk in text.split("BT"):
-                if "ET" in chunk:
-                    segments.append(chunk[:chunk.index("ET")])
-            preview = " ".join(segments)[:2000] if segments else text[:2000]
-        elif blob[:2] == b"PK":
-            content_type = "application/vnd.openxmlformats (docx/xlsx)"
-            preview = f"Office document, {len(blob)} bytes"
-        else:
-            content_type = "application/octet-stream"
+        cursor.execute(
+            f"SELECT [{id_column}], HASHBYTES('SHA2_256', [{blob_column}]) FROM [{table}] "
+            f"WHERE [{blob_column}] IS NOT NULL ORDER BY [{id_column}]"
+        )
+        rows = [(r[0], bytes(r[1]).hex() if r[1] else "") for r in cursor.fetchall()]
+        todo = [(rid, h) for rid, h in rows if stored.get(f"{id_column}={rid}") != h]
+        for rid, _ in todo[:limit]:
+            reader = BlobReader(cursor, table, blob_column, id_column, rid)
             try:
-                preview = blob.decode("utf-8")[:2000]
-            except UnicodeDecodeError:
-                preview = f"Binary data, {len(blob)} bytes, first 100 hex: {blob[:100].hex()}"
-
-        return {
-            "row_id": row_id,
-            "content_type": content_type,
-            "size_bytes": len(blob),
-            "preview": preview,
-        }
+                head = reader.open()
+                if head:
+                    _store_extraction(table, blob_column, f"{id_column}={rid}", reader, head)
+                    extracted += 1
+            except Exception as e:
+                failed.append({"row_id": rid, "error": str(e)})
+    return {"scanned": len(rows), "extracted": extracted, "up_to_date": len(rows) - len(todo),
+            "remaining": max(0, len(todo) - limit), "failed": failed}
+
+
+_report_index = ReportIndex()
+_report_index_state = {"synced_at": 0.0, "indexed": 0, "removed": 0, "pending": 0}
+_report_index_lock = threading.Lock()
+
+# research_reports.row_version (added by the data loader) changes whenever a row does,
+# so unchanged reports are recognized without reading their blobs. Without it, every
+# blob is hashed server-side on each sync.
+_REPORT_VERSIONS_SQL = """
+    IF COL_LENGTH('research_reports', 'row_version') IS NOT NULL
+        EXEC('SELECT id, title, sector, summary, CONVERT(VARCHAR(20), CONVERT(BIGINT, row_version)) FROM research_reports')
+    ELSE
+        SELECT id, title, sector, summary, CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', report_content), 2)
+        FROM research_reports
+"""
+
+
+def _sync_report_index() -> int:
+    """Bring the search index up to date with research_reports; return how many reports are still pending.
+
+    One query lists ids with a row version; only new or changed reports are
+    extracted (via the extraction store) and re-indexed, at most
+    REPORT_INDEX_SYNC_MAX_EXTRACTIONS blob extractions per call, and deleted ones
+    are dropped. While reports remain pending the next search continues the sync.
+    A search that arrives while another thread is syncing uses the index as it is.
+    """
+    if not _report_index_lock.acquire(blocking=False):
+        return _report_index_state["pending"]
+    try:
+        if time.monotonic() - _report_index_state["synced_at"] < REPORT_INDEX_SYNC_SECONDS:
+            return _report_index_state["pending"]
+        indexed = _report_index.hashes()
+        extractions, pending = 0, 0
+        with _pool.connection() as conn:
+            cursor = conn.cursor(as_dict=False)
+            cursor.execute(_REPORT_VERSIONS_SQL)
+            reports = cursor.fetchall()
+            seen = set()
+            for report_id, title, sector, summary, version in reports:
+                doc_id = str(report_id)
+                seen.add(doc_id)
+                doc_hash = hashlib.sha256(f"{version}|{title}|{sector}|{summary}".encode()).hexdigest()
+                if indexed.get(doc_id) == doc_hash:
+                    continue
+                row_key = f"id={report_id}"
+                reader = BlobReader(cursor, "research_reports", "report_content", "id", report_id)
+                head = reader.open()  # size, header and hash of this one blob
+                record = None
+                if head:
+                    record = _extraction_store.get("research_reports", "report_content", row_key, reader.content_hash)
+                    if record is None:
+                        if extractions >= REPORT_INDEX_SYNC_MAX_EXTRACTIONS:
+                            pending += 1
+                            continue
+                        record = _store_extraction("research_reports", "report_content", row_key, reader, head)
+                        extractions += 1
+                text = record["text"] if record else ""
+                _report_index.upsert(doc_id, doc_hash, title or "", f"{sector or ''}. {summary or ''} {text}")
+                _report_index_state["indexed"] += 1
+        removed = [doc_id for doc_id in indexed if doc_id not in seen]
+        if removed:
+            _report_index.remove(removed)
+            _report_index_state["removed"] += len(removed)
+        _report_index_state["pending"] = pending
+        _report_index_state["synced_at"] = 0.0 if pending else time.monotonic()
+        return pending
+    finally:
+        _report_index_lock.release()
+
+
+def search_research_reports(query: str, top_k: int = 5) -> dict:
+    """Rank research reports by BM25 over title, sector, summary and extracted report text.
+
+    While the index is still catching up, results cover only the reports indexed
+    so far and the response carries ``index_incomplete``.
+    """
+    top_k = max(1, min(int(top_k or 5), 20))
+    pending = _sync_report_index()
+    hits = _report_index.search(query, top_k)
+    result = {
+        "query": query,
+        "results": [{"row_id": int(h["doc_id"]), "title": h["title"], "score": h["score"], "snippet": h["snippet"]}
+                    for h in hits],
+    }
+    if pending:
+        result.update(index_incomplete=True, pending_reports=pending)
+    return result
+
+
+def _batch_entry(call) -> dict:
+    """The name (and optional id) echoed back for one batch call."""
+    if not isinstance(call, dict):
+        return {"name": ""}
+    entry = {"name": str(call.get("name") or call.get("toolName") or "").split(TOOL_DELIMITER)[-1]}
+    if "id" in call:
+        entry["id"] = call["id"]
+    return entry
+
+
+def _run_batch_call(call: dict) -> dict:
+    entry = _batch_entry(call)
+    name = entry["name"]
+    if not isinstance(call, dict):
+        entry["error"] = "Each call must be an object {name, arguments}"
+        return entry
+    if name in ("batch", "backfill_blob_extractions", "submit_job") or name not in TOOLS:
+        entry["error"] = f"Unknown or non-batchable tool: {name}"
+        return entry
+    t0 = time.monotonic()
+    try:
+        arguments = call.get("arguments") or {}
+        if isinstance(arguments, str):
+            arguments = json.loads(arguments)
+        if not isinstance(arguments, dict):
+            raise ValueError("arguments must be an object")
+        entry["result"] = TOOLS[name]["fn"](**arguments)
+    except Exception as e:
+        entry["error"] = str(e)
+    entry["elapsed_ms"] = round((time.monotonic() - t0) * 1000)
+    return entry
+
+
+_batch_state = {"abandoned": 0}  # timed-out calls still running in the background
+_batch_state_lock = threading.Lock()
+
+
+def _call_finished(future):
+    with _batch_state_lock:
+        _batch_state["abandoned"] -= 1
+
+
+def _run_batch_parallel(calls: list, timeout_seconds: float) -> list:
+    """Run calls concurrently, bounded by BATCH_MAX_WORKERS, and collect results in order.
+
+    Every call shares one deadline, so the batch takes as long as its slowest call
+    (or the timeout). A timed-out call is reported as an error, but a call that has
+    already started cannot be cancelled: it keeps its thread and pooled connection
+    until it finishes, bounded server-side by DB_QUERY_TIMEOUT_SECONDS per query.
+    Each batch therefore gets its own executor, so a stuck call never occupies a
+    worker the next batch needs; such calls are counted in ``_meta.batch.abandoned``.
+    """
+    executor = ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(calls)), thread_name_prefix="batch")
+    futures = [executor.submit(_run_batch_call, call) for call in calls]
+    deadline = time.monotonic() + timeout_seconds
+    results = []
+    try:
+        for call, future in zip(calls, futures):
+            try:
+                results.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                if not future.cancel():
+                    with _batch_state_lock:
+                        _batch_state["abandoned"] += 1
+                    future.add_done_callback(_call_finished)
+                entry = _batch_entry(call)
+                entry["error"] = f"Timed out after {timeout_seconds:g}s"
+                results.append(entry)
     finally:
-        conn.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def batch(calls: list, parallel: bool = True, timeout_seconds: float = None) -> dict:
+    """Run several tool calls in one invocation.
+
+    All batchable tools are read-only, so by default the calls run concurrently on
+    separate pooled connections. With ``parallel=false`` they run one after another
+    on a single pinned connection. Results come back in request order; a failing
+    call reports its own error without aborting the rest.
+    """
+    if not isinstance(calls, list) or not calls:
+        return {"error": "calls must be a non-empty list of {name, arguments}"}
+    if len(calls) > BATCH_MAX_CALLS:
+        return {"error": f"At most {BATCH_MAX_CALLS} calls per batch"}
+    timeout_seconds = float(timeout_seconds or BATCH_CALL_TIMEOUT_SECONDS)
+
+    t0 = time.monotonic()
+    if parallel and len(calls) > 1:
+        results = _run_batch_parallel(calls, timeout_seconds)
+    else:
+        with _pool.pinned():
+            results = [_run_batch_call(call) for call in calls]
+    return {"results": results, "parallel": bool(parallel and len(calls) > 1),
+            "wall_ms": round((time.monotonic() - t0) * 1000)}
+
+
+_BINDING_RE = re.compile(r"^\$(\w+)\.(\w+)(\[\*\])?$")
+
+
+def _bind_parameters(parameters: dict, outputs: dict) -> dict:
+    """Resolve ``$step.column`` and ``$step.column[*]`` references against earlier step results.
+
+    ``[*]`` refuses a truncated step: its rows are only the first page, so the
+    bound tuple would silently miss values.
+    """
+    bound = {}
+    for name, value in (parameters or {}).items():
+        match = _BINDING_RE.match(value) if isinstance(value, str) else None
+        if not match:
+            bound[name] = value
+            continue
+        step_id, column, every = match.groups()
+        if step_id not in outputs:
+            raise ValueError(f"Parameter '{name}' refers to unknown or later step '{step_id}'")
+        rows = [{k.lower(): v for k, v in row.items()} for row in outputs[step_id]["rows"]]
+        if not rows:
+            raise ValueError(f"Step '{step_id}' returned no rows to bind '{name}'")
+        if column.lower() not in rows[0]:
+            raise ValueError(f"Step '{step_id}' has no column '{column}'")
+        if every:
+            if outputs[step_id]["truncated"]:
+                raise ValueError(f"Step '{step_id}' was truncated, so '{value}' would bind only its first page; "
+                                 "raise that step's page_size or narrow its query")
+            # pymssql expands a tuple parameter into a parenthesized list, for "IN %s".
+            bound[name] = tuple(dict.fromkeys(row[column.lower()] for row in rows))
+        else:
+            bound[name] = rows[0][column.lower()]
+    return bound
+
+
+def run_query_plan(steps: list) -> dict:
+    """Run a multi-step read-only SQL plan in one invocation.
+
+    Steps run in order on one pinned connection, next to the database. A parameter
+    value of ``"$<step>.<column>"`` binds that column from the first row of an
+    earlier step; ``"$<step>.<column>[*]"`` binds every distinct value as a tuple,
+    for ``IN %s``, and fails if that step was truncated. Only the final step's rows
+    are returned; earlier steps come back as summaries (row count, columns and a
+    few sample rows). The plan stops at the first failing step.
+    """
+    if not isinstance(steps, list) or not steps:
+        return {"error": "steps must be a non-empty list of {id, query, parameters}"}
+    if len(steps) > PLAN_MAX_STEPS:
+        return {"error": f"At most {PLAN_MAX_STEPS} steps per plan"}
+
+    t0 = time.monotonic()
+    outputs, summaries = {}, []
+    with _pool.pinned():
+        for i, step in enumerate(steps):
+            step_id = str(step.get("id") or f"step{i + 1}") if isinstance(step, dict) else f"step{i + 1}"
+            summary = {"id": step_id}
+            summaries.append(summary)
+            t_step = time.monotonic()
+            if not isinstance(step, dict):
+                result = {"error": "Step must be an object of {id, query, parameters}"}
+            elif step_id in outputs:
+                result = {"error": f"Duplicate step id '{step_id}'"}
+            elif not isinstance(step.get("query"), str) or not step["query"].strip():
+                result = {"error": "Step has no query"}
+            elif not isinstance(step.get("parameters") or {}, dict):
+                result = {"error": "Step parameters must be an object"}
+            else:
+                try:
+                    parameters = _bind_parameters(step.get("parameters"), outputs)
+                    result = execute_sql_query(step["query"], parameters, page_size=step.get("page_size") or MAX_ROWS)
+                except Exception as e:
+                    result = {"error": str(e)}
+            summary["elapsed_ms"] = round((time.monotonic() - t_step) * 1000)
+            if "error" in result:
+                summary["error"] = result["error"]
+                return {"error": f"Step '{step_id}' failed: {result['error']}", "steps": summaries,
+                        "wall_ms": round((time.monotonic() - t0) * 1000)}
+            outputs[step_id] = {"rows": result["rows"], "truncated": result["truncated"]}
+            summary.update(row_count=result["row_count"], truncated=result["truncated"], cached=result["cached"],
+                           columns=list(result["rows"][0]) if result["rows"] else [],
+                           sample=result["rows"][:PLAN_SAMPLE_ROWS])
+
+    final = summaries.pop()
+    final["rows"] = outputs[final["id"]]["rows"]
+    del final["sample"]
+    return {"steps": summaries, "final": final, "wall_ms": round((time.monotonic() - t0) * 1000)}
+
+
+_job_store = JobStore()
+_lambda_client = None
+
+
+def submit_job(tool: str, tool_arguments: dict = None) -> dict:
+    """Start a tool call in the background and return its job id at once.
+
+    The call runs in a separate Event invocation of this function; its status and
+    result are written to the job store and fetched with ``get_job_result``.
+    """
+    global _lambda_client
+    name = (tool or "").split(TOOL_DELIMITER)[-1]
+    if name in ("submit_job", "get_job_result") or name not in TOOLS:
+        return {"error": f"Unknown or non-submittable tool: {name}"}
+    if not _job_store.enabled:
+        return {"error": "Async jobs are not configured (JOB_BUCKET is not set)"}
+    if isinstance(tool_arguments, str):
+        tool_arguments = json.loads(tool_arguments)
+    job_id = JobStore.new_id()
+    record = {"job_id": job_id, "name": name, "status": "pending", "submitted_at": time.time()}
+    _job_store.put(job_id, record)
+    try:
+        if _lambda_client is None:
+            _lambda_client = boto3.client("lambda")
+        _lambda_client.invoke(
+            FunctionName=JOB_FUNCTION_NAME, InvocationType="Event",
+            Payload=json.dumps({"job": {"job_id": job_id, "name": name, "arguments": tool_arguments or {}}}, default=str),
+        )
+    except Exception as e:
+        # Nothing will ever run this job, so it must not stay pending.
+        record.update(status="failed", error=f"Could not start job: {e}", finished_at=time.time())
+        _job_store.put(job_id, record)
+        return {"job_id": job_id, "name": name, "status": "failed", "error": record["error"]}
+    return {"job_id": job_id, "name": name, "status": "pending"}
+
+
+def _run_job(job: dict, context=None) -> dict:
+    started_at = time.time()
+    remaining_ms = getattr(context, "get_remaining_time_in_millis", None)
+    # Past its deadline the invocation has been killed (timeout or OOM) without writing a result.
+    deadline = started_at + (remaining_ms() / 1000 if remaining_ms else JOB_TIMEOUT_SECONDS)
+    record = {"job_id": job["job_id"], "name": job["name"], "status": "running", "started_at": started_at,
+              "deadline": deadline}
+    _job_store.put(job["job_id"], record)
+    t0 = time.monotonic()
+    try:
+        result = TOOLS[job["name"]]["fn"](**(job.get("arguments") or {}))
+        if isinstance(result, dict) and "error" in result:
+            record.update(status="failed", error=result["error"])
+        else:
+            record.update(status="succeeded", result=result)
+    except Exception as e:
+        record.update(status="failed", error=str(e))
+    record.update(finished_at=time.time(), elapsed_ms=round((time.monotonic() - t0) * 1000))
+    _job_store.put(job["job_id"], record)
+    return {"job_id": job["job_id"], "status": record["status"]}
+
+
+def get_job_result(job_id: str) -> dict:
+    """Return a submitted job's status, and its result once it has finished.
+
+    A job still ``running`` past its deadline was killed before it could record an
+    outcome, and is reported as failed.
+    """
+    if not _job_store.enabled:
+        return {"error": "Async jobs are not configured (JOB_BUCKET is not set)"}
+    if not JobStore.valid_id(job_id):
+        return {"error": f"Invalid job_id: {job_id}"}
+    record = _job_store.get(job_id)
+    if record is None:
+        return {"error": f"Unknown job_id: {job_id}"}
+    if record.get("status") == "running" and time.time() > record.get("deadline", float("inf")):
+        record.update(status="failed", error="timed out")
+    return record
 
 
 # Tool registry
 TOOLS = {
     "execute_sql_query": {
         "fn": execute_sql_query,
-        "description": "Execute read-only SQL queries on NeoBank MSSQL database. Returns structured results.",
+        "description": "Execute read-only SQL queries on NeoBank MSSQL database. Returns structured results. "
+                       "If the result is truncated, call again with the same query and the returned continuation_token.",
         "inputSchema": {
             "type": "object",
             "properties": {
                 "query": {"type": "string", "description": "SQL SELECT query to execute"},
                 "parameters": {"type": "object", "description": "Query parameters for parameterized queries"},
+                "page_size": {"type": "integer", "description": "Rows per page (max 500, default 500)"},
+                "continuation_token": {"type": "string", "description": "Token from a truncated result to fetch the next page"},
+                "use_cache": {"type": "boolean", "description": "Serve repeated queries from the result cache (default: true)"},
+                "format": {"type": "string", "enum": ["rows", "columnar"],
+                           "description": "rows (default): one object per row; columnar: column names once plus one array per column"},
+                "compress": {"type": "boolean", "description": "Return a gzip+base64 payload (for programmatic clients only)"},
             },
             "required": ["query"],
         },
     },
     "get_schema_info": {
         "fn": get_schema_info,
-        "description": "Get database schema info — list tables or get columns/types for a specific table.",
+        "description": "Get database schema info — list tables, get columns/types for a specific table, "
+                       "or set include_columns=true to get every table with columns, primary and foreign keys in one call.",
         "inputSchema": {
             "type": "object",
             "properties": {
                 "database_name": {"type": "string", "description": "Database name (default: NeoBank)"},
                 "table_name": {"type": "string", "description": "Table name to get columns for. Omit to list all tables."},
+                "include_columns": {"type": "boolean", "description": "Return all tables with columns, primary keys and foreign keys"},
             },
         },
     },
@@ -177,12 +1121,132 @@ TOOLS = {
             "required": ["table", "blob_column", "row_id"],
         },
     },
+    "search_research_reports": {
+        "fn": search_research_reports,
+        "description": "Full-text search over research report content (title, summary and extracted PDF text). "
+                       "Returns ranked row ids with snippets; use analyze_blob_data on a row id for more text.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Search terms, e.g. 'GCC oil gas sector review'"},
+                "top_k": {"type": "integer", "description": "Number of results (default: 5, max: 20)"},
+            },
+            "required": ["query"],
+        },
+    },
+    "run_query_plan": {
+        "fn": run_query_plan,
+        "description": "Run a multi-step read-only SQL plan in one call, next to the database. Later steps can bind "
+                       "parameters from earlier results: '$<step>.<column>' takes the first row's value, "
+                       "'$<step>.<column>[*]' takes all values for 'IN %s' (refused if that step was truncated). Returns the final step's rows and a "
+                       "summary of each earlier step.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "steps": {
+                    "type": "array",
+                    "description": "SQL steps, run in order (max 10)",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "string", "description": "Step id used in bindings (default: step1, step2, ...)"},
+                            "query": {"type": "string", "description": "SQL SELECT query with %s placeholders"},
+                            "parameters": {"type": "object", "description": "Ordered parameter values or $step.column bindings"},
+                            "page_size": {"type": "integer", "description": "Maximum rows for this step (max 500)"},
+                        },
+                        "required": ["query"],
+                    },
+                },
+            },
+            "required": ["steps"],
+        },
+    },
+    "backfill_blob_extractions": {
+        "fn": backfill_blob_extractions,
+        "description": "Pre-extract text from a blob column into the extraction store (operational; safe to re-run).",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "table": {"type": "string", "description": "Table containing the blob column (default: research_reports)"},
+                "blob_column": {"type": "string", "description": "Blob column (default: report_content)"},
+                "id_column": {"type": "string", "description": "Name of the ID column (default: id)"},
+                "limit": {"type": "integer", "description": "Maximum blobs to extract in this call (default: 50)"},
+            },
+        },
+    },
+    "batch": {
+        "fn": batch,
+        "description": "Run several independent tool calls (execute_sql_query, get_schema_info, analyze_blob_data, "
+                       "search_research_reports, run_query_plan) "
+                       "in one round trip, concurrently. Returns one result per call, in order.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "calls": {
+                    "type": "array",
+                    "description": "Tool calls to run",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"type": "string", "description": "Tool name"},
+                            "arguments": {"type": "object", "description": "Tool arguments"},
+                            "id": {"type": "string", "description": "Optional id echoed back with the result"},
+                        },
+                        "required": ["name"],
+                    },
+                },
+                "parallel": {"type": "boolean", "description": "Run calls concurrently (default: true)"},
+                "timeout_seconds": {"type": "number", "description": "Deadline for the whole batch (default: 25)"},
+            },
+            "required": ["calls"],
+        },
+    },
+    "submit_job": {
+        "fn": submit_job,
+        "description": "Start a slow tool call (a large execute_sql_query, run_query_plan or analyze_blob_data) in the "
+                       "background. Returns a job_id immediately; do other lookups, then call get_job_result.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "tool": {"type": "string", "description": "Tool to run, e.g. execute_sql_query"},
+                "tool_arguments": {"type": "object", "description": "Arguments for that tool"},
+            },
+            "required": ["tool"],
+        },
+    },
+    "get_job_result": {
+        "fn": get_job_result,
+        "description": "Get the status of a job started with submit_job (pending, running, succeeded or failed) "
+                       "and its result once it has succeeded.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "job_id": {"type": "string", "description": "Job id returned by submit_job"},
+            },
+            "required": ["job_id"],
+        },
+    },
 }
 
 
+def _response_meta():
+    """Server-side metrics attached to every tool response."""
+    return {
+        "pool": _pool.stats(),
+        "secrets": get_secret_cache().stats(),
+        "schema_cache": {"hits": _schema_cache["hits"], "misses": _schema_cache["misses"]},
+        "result_cache": _result_cache.stats(),
+        "extraction_store": _extraction_store.stats(),
+        "report_index": {"indexed": _report_index_state["indexed"], "removed": _report_index_state["removed"],
+                         "pending": _report_index_state["pending"]},
+        "jobs": _job_store.stats(),
+        "batch": dict(_batch_state),
+    }
+
+
 def handler(event, context):
     """Lambda handler — processes MCP tool calls from AgentCore Gateway."""
-    delimiter = "___"
+    delimiter = TOOL_DELIMITER
     tool_name = None
 
     # Gateway format: tool name in context.client_context.custom
@@ -191,6 +1255,10 @@ def handler(event, context):
         raw = cc.custom.get("bedrockAgentCoreToolName", "")
         tool_name = raw[raw.index(delimiter) + len(delimiter):] if delimiter in raw else raw
 
+    # Event invoke from submit_job: run the job and record its result
+    if not tool_name and isinstance(event.get("job"), dict):
+        return _run_job(event["job"], context)
+
     # Direct invoke format: tool name in event
     if not tool_name:
         raw = event.get("name") or event.get("toolName") or ""
@@ -207,19 +1275,38 @@ def handler(event, context):
     arguments = {k: v for k, v in arguments.items() if k not in ("name", "toolName", "arguments", "input")}
 
     if tool_name not in TOOLS:
-        return {
+        response = {
             "content": [{"type": "text", "text": json.dumps({"error": f"Unknown tool: {tool_name}"})}],
             "isError": True,
         }
+    else:
+        try:
+            result = TOOLS[tool_name]["fn"](**arguments)
+            response = {
+                "content": [{"type": "text", "text": json.dumps(result, default=str)}],
+                "isError": False,
+                "_meta": _response_meta(),
+            }
+        except Exception as e:
+            response = {
+                "content": [{"type": "text", "text": json.dumps({"error": str(e)})}],
+                "isError": True,
+                "_meta": _response_meta(),
+            }
 
-    try:
-        result = TOOLS[tool_name]["fn"](**arguments)
-        return {
-            "content": [{"type": "text", "text": json.dumps(result, default=str)}],
-            "isError": False,
-        }
-    except Exception as e:
-        return {
-            "content": [{"type": "text", "text": json.dumps({"error": str(e)})}],
-            "isError": True,
-        }
+    if cc and (getattr(cc, "custom", None) or {}).get("proxyAcceptEncoding") == "gzip":
+        return _envelope(response)
+    return response
+
+
+def _envelope(response: dict) -> dict:
+    """Gzip the whole response for the cross-region hop; the proxy unwraps it.
+
+    The tool result is JSON text inside a JSON response, so compressing the outer
+    document covers both levels of encoding. Small responses are sent as-is.
+    """
+    raw = json.dumps(response, default=str, separators=(",", ":")).encode()
+    if len(raw) < ENVELOPE_MIN_BYTES:
+        return response
+    return {"_envelope": "gzip+base64", "uncompressed_bytes": len(raw),
+            "payload": base64.b64encode(gzip.compress(raw)).decode()}
@@ -0,0 +1,273 @@
+"""Incremental PDF text extraction for analyze_blob_data.
+
+``PdfTextExtractor`` is fed the PDF in chunks (memoryview slices or ranged reads)
+and walks it as a small state machine: outside a stream it looks for the next
+``stream`` keyword and inspects the preceding dictionary; inside a stream it
+inflates FlateDecode data lazily, only as far as needed, and pulls text-showing
+operators (``Tj``, ``TJ``, ``'``, ``"``) out of ``BT ... ET`` blocks. Feeding stops
+as soon as the character budget is reached, or after ``max_scan_bytes`` for a PDF
+with little or no text, so memory and work stay bounded rather than growing with
+the blob size. A PDF without text operators yields no text and ``no_text`` in its
+stats; its raw syntax is never passed off as text.
+"""
+import os
+import re
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+PDF_MAX_SCAN_BYTES = int(os.environ.get("PDF_MAX_SCAN_BYTES", str(16 * 1024 * 1024)))
+
+_STREAM_START_RE = re.compile(rb"(?<!end)stream(?:\r\n|\n|\r)")
+_OBJECT_END_RE = re.compile(rb"endobj|endstream")
+_BT_RE = re.compile(rb"\bBT\b")
+_ET_RE = re.compile(rb"\bET\b")
+_NUMBER_RE = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_OPERATOR_RE = re.compile(rb"[A-Za-z'\"*]+")
+_WHITESPACE = b" \t\r\n\f\x00"
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+            ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+# Streams that never carry page text; skip them without inflating.
+_NON_TEXT_MARKERS = (b"/Image", b"/FontFile", b"/Length1", b"/Metadata", b"/XRef", b"/EmbeddedFile")
+
+_DICT_CONTEXT_BYTES = 2048
+_MAX_BLOCK_BYTES = 256 * 1024
+
+
+def _parse_literal(data: bytes, i: int):
+    """Parse a ``( ... )`` string starting at ``data[i] == '('``; return (bytes, next index)."""
+    out = bytearray()
+    depth = 0
+    n = len(data)
+    while i < n:
+        c = data[i]
+        if c == 0x5C:  # backslash
+            i += 1
+            if i >= n:
+                break
+            e = data[i]
+            if e in _ESCAPES:
+                out += _ESCAPES[e]
+            elif 0x30 <= e <= 0x37:  # octal \ddd
+                j = i
+                while j < n and j < i + 3 and 0x30 <= data[j] <= 0x37:
+                    j += 1
+                out.append(int(data[i:j], 8) & 0xFF)
+                i = j - 1
+            elif e in b"\r\n":
+                pass  # line continuation
+            else:
+                out.append(e)
+        elif c == 0x28:  # (
+            if depth:
+                out.append(c)
+            depth += 1
+        elif c == 0x29:  # )
+            depth -= 1
+            if depth == 0:
+                return bytes(out), i + 1
+            out.append(c)
+        else:
+            out.append(c)
+        i += 1
+    return bytes(out), n
+
+
+def _parse_hex(data: bytes, i: int):
+    end = data.find(b">", i)
+    if end < 0:
+        return b"", len(data)
+    digits = bytes(b for b in data[i + 1:end] if b not in _WHITESPACE)
+    if len(digits) % 2:
+        digits += b"0"
+    try:
+        return bytes.fromhex(digits.decode("ascii")), end + 1
+    except ValueError:
+        return b"", end + 1
+
+
+def extract_text_block(block: bytes) -> str:
+    """Return the text shown by the operators inside one ``BT ... ET`` block."""
+    parts = []
+    i, n = 0, len(block)
+    in_array = False
+    while i < n:
+        c = block[i]
+        if c in _WHITESPACE:
+            i += 1
+        elif c == 0x28:
+            s, i = _parse_literal(block, i)
+            parts.append(s.decode("latin-1"))
+        elif c == 0x3C and block[i + 1:i + 2] != b"<":
+            s, i = _parse_hex(block, i)
+            if s and all(32 <= b < 127 or b in b"\r\n\t" for b in s):
+                parts.append(s.decode("latin-1"))
+        elif c == 0x5B:
+            in_array, i = True, i + 1
+        elif c == 0x5D:
+            in_array, i = False, i + 1
+        else:
+            m = _NUMBER_RE.match(block, i)
+            if m:
+                # Large negative kerning inside TJ arrays stands for a word gap.
+                if in_array and float(m.group()) < -200:
+                    parts.append(" ")
+                i = m.end()
+                continue
+            m = _OPERATOR_RE.match(block, i)
+            if m:
+                if m.group() in (b"Tj", b"TJ", b"'", b'"', b"T*", b"Td", b"TD", b"Tm"):
+                    parts.append(" ")
+                i = m.end()
+            else:
+                i += 1
+    return " ".join("".join(parts).split())
+
+
+class PdfTextExtractor:
+    """Streaming text extractor; call ``feed()`` until it returns True, then ``close()``."""
+
+    def __init__(self, max_chars: int = 2000, max_scan_bytes: int = PDF_MAX_SCAN_BYTES):
+        self.max_chars = max_chars
+        self.max_scan_bytes = max_scan_bytes
+        self.segments = []
+        self.page_offsets = []  # text offset where each text-bearing content stream starts
+        self.stats = {"bytes_scanned": 0, "streams": 0, "streams_inflated": 0, "streams_skipped": 0}
+        self.done = False
+        self._chars = 0
+        self._buf = bytearray()
+        self._in_stream = False
+        self._inflater = None
+        self._content = bytearray()  # decoded content awaiting a complete BT ... ET block
+        self._stream_has_text = False
+        self._skip_stream = False
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.segments)[:self.max_chars]
+
+    def feed(self, data) -> bool:
+        """Consume the next chunk; returns True once the text or scan budget is reached."""
+        if self.done:
+            return True
+        data = bytes(data)
+        self.stats["bytes_scanned"] += len(data)
+        self._buf += data
+        while not self.done and self._step():
+            pass
+        if not self.done and self.stats["bytes_scanned"] >= self.max_scan_bytes:
+            self.stats["scan_limit_reached"] = True
+            self.done = True
+        return self.done
+
+    def close(self):
+        """Flush whatever remains once the input is exhausted."""
+        if self._in_stream and not self.done:
+            self._consume_stream_bytes(bytes(self._buf), final=True)
+        if not self.segments:
+            self.stats["no_text"] = True
+        self._buf.clear()
+        self._content.clear()
+        self._inflater = None
+        return self
+
+    # -- internals -------------------------------------------------------
+
+    def _step(self) -> bool:
+        """Process as much of the buffer as possible; True if progress was made."""
+        if not self._in_stream:
+            m = _STREAM_START_RE.search(self._buf)
+            if not m:
+                # Keep only enough tail to hold a stream dictionary plus a split keyword.
+                if len(self._buf) > _DICT_CONTEXT_BYTES:
+                    del self._buf[:len(self._buf) - _DICT_CONTEXT_BYTES]
+                return False
+            context = bytes(self._buf[max(0, m.start() - _DICT_CONTEXT_BYTES):m.start()])
+            ends = list(_OBJECT_END_RE.finditer(context))
+            if ends:
+                context = context[ends[-1].end():]
+            del self._buf[:m.end()]
+            self._begin_stream(context)
+            return True
+
+        end = self._buf.find(b"endstream")
+        if end < 0:
+            keep = len(b"endstream")
+            if len(self._buf) > keep:
+                self._consume_stream_bytes(bytes(self._buf[:-keep]), final=False)
+                del self._buf[:-keep]
+            return False
+        self._consume_stream_bytes(bytes(self._buf[:end]), final=True)
+        del self._buf[:end + len(b"endstream")]
+        self._in_stream = False
+        return True
+
+    def _begin_stream(self, dictionary: bytes):
+        self.stats["streams"] += 1
+        self._in_stream = True
+        self._content.clear()
+        self._stream_has_text = False
+        self._skip_stream = any(marker in dictionary for marker in _NON_TEXT_MARKERS)
+        if self._skip_stream:
+            self.stats["streams_skipped"] += 1
+            self._inflater = None
+        elif b"/FlateDecode" in dictionary or b"/Fl " in dictionary or b"/Fl]" in dictionary:
+            self.stats["streams_inflated"] += 1
+            self._inflater = zlib.decompressobj()
+        else:
+            self._inflater = None
+
+    def _consume_stream_bytes(self, raw: bytes, final: bool):
+        if self._skip_stream or self.done:
+            return
+        if self._inflater is None:
+            self._scan_content(raw.rstrip(b"\r\n") if final else raw)
+            return
+        try:
+            pending = raw
+            while pending and not self.done:
+                # Inflate in bounded slices so a large stream never expands all at once.
+                out = self._inflater.decompress(pending, CHUNK_SIZE)
+                pending = self._inflater.unconsumed_tail
+                self._scan_content(out)
+            if final and not self.done:
+                self._scan_content(self._inflater.flush())
+        except zlib.error:
+            self._skip_stream = True
+
+    def _scan_content(self, decoded: bytes):
+        self._content += decoded
+        while not self.done:
+            bt = _BT_RE.search(self._content)
+            if not bt:
+                del self._content[:max(0, len(self._content) - 1)]  # keep a split "B"
+                return
+            et = _ET_RE.search(self._content, bt.end())
+            if not et:
+                if bt.start():
+                    del self._content[:bt.start()]
+                if len(self._content) > _MAX_BLOCK_BYTES:
+                    self._content.clear()
+                return
+            text = extract_text_block(bytes(self._content[bt.end():et.start()]))
+            del self._content[:et.end()]
+            if text:
+                self._add_text(text)
+
+    def _add_text(self, text: str):
+        if not self._stream_has_text:
+            self._stream_has_text = True
+            self.page_offsets.append(self._chars + (1 if self.segments else 0))
+        self.segments.append(text)
+        self._chars += len(text) + (1 if len(self.segments) > 1 else 0)
+        if self._chars >= self.max_chars:
+            self.done = True
+
+
+def extract_pdf_text(data, max_chars: int = 2000) -> PdfTextExtractor:
+    """Extract up to ``max_chars`` of text from an in-memory PDF without copying it whole."""
+    view = memoryview(data)
+    extractor = PdfTextExtractor(max_chars=max_chars)
+    for offset in range(0, len(view), CHUNK_SIZE):
+        if extractor.feed(view[offset:offset + CHUNK_SIZE]):
+            break
+    return extractor.close()
@@ -0,0 +1,111 @@
+"""BM25 inverted index over research report text.
+
+The index is a pair of SQLite tables (documents and postings) stored next to the
+extraction store under /tmp. Documents are added or replaced one at a time as
+their content hash changes, so the index is maintained incrementally rather than
+rebuilt.
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+REPORT_INDEX_PATH = os.environ.get("REPORT_INDEX_PATH", os.environ.get("EXTRACTION_STORE_PATH", "/tmp/blob_extractions.db"))
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 240
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class ReportIndex:
+    def __init__(self, path=REPORT_INDEX_PATH):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS search_docs (
+                doc_id TEXT PRIMARY KEY, content_hash TEXT, title TEXT, text TEXT, length INTEGER);
+            CREATE TABLE IF NOT EXISTS search_postings (
+                term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS ix_search_postings_doc ON search_postings (doc_id);
+        """)
+        self._db.commit()
+
+    def hashes(self) -> dict:
+        with self._lock:
+            return dict(self._db.execute("SELECT doc_id, content_hash FROM search_docs").fetchall())
+
+    def upsert(self, doc_id, content_hash, title, text):
+        """Index (or re-index) one document."""
+        doc_id = str(doc_id)
+        counts = Counter(tokenize(f"{title} {text}"))
+        with self._lock:
+            self._db.execute("DELETE FROM search_postings WHERE doc_id = ?", (doc_id,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_docs VALUES (?, ?, ?, ?, ?)",
+                (doc_id, content_hash, title, text, sum(counts.values())),
+            )
+            self._db.executemany(
+                "INSERT INTO search_postings VALUES (?, ?, ?)",
+                [(term, doc_id, tf) for term, tf in counts.items()],
+            )
+            self._db.commit()
+
+    def remove(self, doc_ids):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._db.execute("DELETE FROM search_postings WHERE doc_id = ?", (str(doc_id),))
+                self._db.execute("DELETE FROM search_docs WHERE doc_id = ?", (str(doc_id),))
+            self._db.commit()
+
+    def search(self, query: str, top_k: int = 5) -> list:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            n_docs, total_len = self._db.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM search_docs").fetchone()
+            if not n_docs:
+                return []
+            avgdl = total_len / n_docs or 1.0
+            placeholders = ",".join("?" * len(terms))
+            postings = self._db.execute(
+                f"SELECT p.term, p.doc_id, p.tf, d.length FROM search_postings p "
+                f"JOIN search_docs d ON d.doc_id = p.doc_id WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+
+            df = Counter(term for term, _, _, _ in postings)
+            scores = Counter()
+            for term, doc_id, tf, length in postings:
+                idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl))
+
+            results = []
+            for doc_id, score in scores.most_common(top_k):
+                title, text = self._db.execute(
+                    "SELECT title, text FROM search_docs WHERE doc_id = ?", (doc_id,)
+                ).fetchone()
+                results.append({"doc_id": doc_id, "title": title, "score": round(score, 4),
+                                "snippet": snippet(text, terms)})
+        return results
+
+
+def snippet(text: str, terms: list, width: int = SNIPPET_CHARS) -> str:
+    """A window of ``text`` around the first occurrence of any query term."""
+    lowered = text.lower()
+    hits = [m.start() for t in terms for m in [re.search(rf"\b{re.escape(t)}", lowered)] if m]
+    if not hits:
+        return text[:width]
+    start = max(0, min(hits) - width // 3)
+    end = start + width
+    return ("…" if start else "") + " ".join(text[start:end].split()) + ("…" if end < len(text) else "")
@@ -0,0 +1,170 @@
+"""Query result cache for execute_sql_query.
+
+Results are keyed on normalized SQL text plus parameters and paging arguments,
+held in a size-bounded LRU and expired with a per-table TTL (the shortest TTL of
+any table the query reads). When ``RESULT_CACHE_PATH`` is set, entries are also
+written to a SQLite file (e.g. under /tmp) so they survive a warm restart of the
+Lambda runtime.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_MAX_VALUE_BYTES = int(os.environ.get("RESULT_CACHE_MAX_VALUE_BYTES", str(1024 * 1024)))
+RESULT_CACHE_DEFAULT_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_DEFAULT_TTL_SECONDS", "300"))
+RESULT_CACHE_PATH = os.environ.get("RESULT_CACHE_PATH", "")
+# Reference data changes rarely; transactions are appended throughout the day.
+RESULT_CACHE_TABLE_TTLS = json.loads(os.environ.get("RESULT_CACHE_TABLE_TTLS") or json.dumps({
+    "market_analysis": 3600,
+    "research_reports": 3600,
+    "customers": 900,
+    "financial_data": 900,
+    "transactions": 60,
+}))
+
+_LITERAL_RE = re.compile(r"('(?:[^']|'')*'|\"[^\"]*\")")
+_TABLE_RE = re.compile(r"\b(?:from|join)\s+(?:\[?\w+\]?\.)*\[?(\w+)\]?", re.IGNORECASE)
+_SOURCE_TABLE_RE = re.compile(r"(?:\[?\w+\]?\.)*\[?(\w+)\]?")
+_FROM_RE = re.compile(r"\bfrom\b")
+_FROM_END_RE = re.compile(r"\b(?:where|group|having|order|option|union|intersect|except|for)\b")
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace and case outside string literals; drop a trailing semicolon."""
+    parts = _LITERAL_RE.split(query.strip().rstrip(";"))
+    for i in range(0, len(parts), 2):  # even indexes are outside literals
+        parts[i] = re.sub(r"\s+", " ", parts[i]).lower()
+    return "".join(parts).strip()
+
+
+def from_sources(normalized_sql: str) -> list:
+    """The comma-separated table sources of every FROM clause, in order.
+
+    A source keeps its alias and any JOINs, so ``from a x join b y on ...`` is one
+    source and ``from a x, b y`` is two.
+    """
+    sql = _LITERAL_RE.sub("''", normalized_sql)
+    sources = []
+    for match in _FROM_RE.finditer(sql):
+        start = i = match.end()
+        depth = 0
+        while i < len(sql):
+            char = sql[i]
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                if not depth:
+                    break  # end of the subquery this FROM belongs to
+                depth -= 1
+            elif not depth and char == ",":
+                sources.append(sql[start:i].strip())
+                start = i + 1
+            elif not depth and _FROM_END_RE.match(sql, i):
+                break
+            i += 1
+        sources.append(sql[start:i].strip())
+    return [source for source in sources if source]
+
+
+def referenced_tables(normalized_sql: str) -> set:
+    tables = {m.group(1).lower() for m in _TABLE_RE.finditer(_LITERAL_RE.sub("''", normalized_sql))}
+    # _TABLE_RE sees only the first table after FROM; comma joins list more.
+    for source in from_sources(normalized_sql):
+        match = _SOURCE_TABLE_RE.match(source)
+        if match:
+            tables.add(match.group(1).lower())
+    return tables
+
+
+def ttl_for(normalized_sql: str) -> float:
+    tables = referenced_tables(normalized_sql)
+    if not tables:
+        return RESULT_CACHE_DEFAULT_TTL_SECONDS
+    return min(float(RESULT_CACHE_TABLE_TTLS.get(t, RESULT_CACHE_DEFAULT_TTL_SECONDS)) for t in tables)
+
+
+class ResultCache:
+    """LRU of JSON-serializable results with absolute expiry times."""
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, path=RESULT_CACHE_PATH):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._db = None
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "persistent_hits": 0}
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, expires_at REAL, accessed_at REAL, value TEXT)"
+            )
+
+    @staticmethod
+    def make_key(normalized_sql: str, *args) -> str:
+        raw = json.dumps([normalized_sql, *args], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM results WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row:
+                    self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    value = json.loads(row[1])
+                    self._remember(key, row[0], value)
+                    self._stats["hits"] += 1
+                    self._stats["persistent_hits"] += 1
+                    return value
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        encoded = json.dumps(value, default=str)
+        if len(encoded) > RESULT_CACHE_MAX_VALUE_BYTES:
+            return
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(key, expires_at, json.loads(encoded))
+            if self._db is not None:
+                self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, expires_at, accessed_at, value) VALUES (?, ?, ?, ?)",
+                    (key, expires_at, now, encoded),
+                )
+                self._db.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY accessed_at DESC LIMIT ?)",
+                    (self._max_entries,),
+                )
+                self._db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), max_entries=self._max_entries)
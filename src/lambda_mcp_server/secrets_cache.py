@@ -0,0 +1,114 @@
+"""In-process Secrets Manager credential cache shared by the MCP server and data loader.
+
+Secrets are cached for ``SECRET_CACHE_TTL_SECONDS`` and refreshed on a background
+thread once they are within ``SECRET_CACHE_REFRESH_AHEAD_SECONDS`` of expiry, so
+warm invocations never wait on Secrets Manager. When a login fails because the
+secret was rotated, the cached value is invalidated and the connect is retried once.
+"""
+import json
+import os
+import threading
+import time
+
+import boto3
+
+SECRET_REGION = os.environ.get("SECRET_REGION", "me-south-1")
+SECRET_CACHE_TTL_SECONDS = float(os.environ.get("SECRET_CACHE_TTL_SECONDS", "900"))
+SECRET_CACHE_REFRESH_AHEAD_SECONDS = float(os.environ.get("SECRET_CACHE_REFRESH_AHEAD_SECONDS", "60"))
+
+
+class SecretCache:
+    """Caches one JSON secret with TTL expiry and refresh-ahead."""
+
+    def __init__(self, secret_id, region_name=SECRET_REGION, ttl=SECRET_CACHE_TTL_SECONDS,
+                 refresh_ahead=SECRET_CACHE_REFRESH_AHEAD_SECONDS):
+        self._secret_id = secret_id
+        self._region_name = region_name
+        self._ttl = ttl
+        self._refresh_ahead = min(refresh_ahead, ttl)
+        self._client = None
+        self._value = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "background_refreshes": 0,
+                       "refresh_errors": 0, "invalidations": 0, "rotation_retries": 0}
+
+    def _fetch(self):
+        if self._client is None:
+            self._client = boto3.client("secretsmanager", region_name=self._region_name)
+        response = self._client.get_secret_value(SecretId=self._secret_id)
+        return json.loads(response["SecretString"])
+
+    def _store(self, value):
+        with self._lock:
+            self._value = value
+            self._fetched_at = time.monotonic()
+
+    def _background_refresh(self):
+        try:
+            self._store(self._fetch())
+            with self._lock:
+                self._stats["background_refreshes"] += 1
+        except Exception:
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self):
+        """Return the secret, fetching synchronously only when missing or expired."""
+        with self._lock:
+            age = time.monotonic() - self._fetched_at
+            if self._value is not None and age < self._ttl:
+                self._stats["hits"] += 1
+                if age >= self._ttl - self._refresh_ahead and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._background_refresh, daemon=True).start()
+                return self._value
+            self._stats["misses"] += 1
+        value = self._fetch()
+        self._store(value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._fetched_at = 0.0
+            self._stats["invalidations"] += 1
+
+    def connect(self, connect_fn):
+        """Call ``connect_fn(secret)``; on a login failure refresh the secret and retry once."""
+        try:
+            return connect_fn(self.get())
+        except Exception as e:
+            if not is_login_failure(e):
+                raise
+            self.invalidate()
+            with self._lock:
+                self._stats["rotation_retries"] += 1
+            return connect_fn(self.get())
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def is_login_failure(exc):
+    """True for SQL Server login errors (18456), which follow a credential rotation."""
+    message = str(exc).lower()
+    return "18456" in message or "login failed" in message
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_secret_cache(secret_id=None):
+    """Return the process-wide cache for ``secret_id`` (default: ``SECRET_ARN``)."""
+    secret_id = secret_id or os.environ["SECRET_ARN"]
+    with _caches_lock:
+        if secret_id not in _caches:
+            _caches[secret_id] = SecretCache(secret_id)
+        return _caches[secret_id]
@@ -1,12 +1,144 @@
 """Proxy Lambda in eu-west-1 — forwards MCP tool calls to the MCP server in me-south-1.
 Preserves the Gateway context (client_context) which contains the tool name."""
+import bisect
+import gzip
 import json
 import os
 import base64
+import random
+import time
+from collections import OrderedDict
+
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ConnectTimeoutError, EndpointConnectionError
 
-lambda_client = boto3.client("lambda", region_name=os.environ.get("DATA_REGION", "me-south-1"))
+DATA_REGION = os.environ.get("DATA_REGION", "me-south-1")
 TARGET_FUNCTION = os.environ.get("MCP_SERVER_FUNCTION", "neobank-mcp-server")
+# The client lives across warm invocations: keep its TLS connections to me-south-1
+# alive and size the pool for concurrent Gateway calls. The read timeout outlasts
+# the MCP server's 60 s timeout (and stays under the proxy's own 90 s), so a slow
+# call is never cut off and re-sent. Tool calls are not idempotent, so botocore
+# does not retry them; handler() retries only when the call cannot have run:
+# throttled by Lambda, or no connection made.
+PROXY_MAX_POOL_CONNECTIONS = int(os.environ.get("PROXY_MAX_POOL_CONNECTIONS", "16"))
+PROXY_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("PROXY_CONNECT_TIMEOUT_SECONDS", "2"))
+PROXY_READ_TIMEOUT_SECONDS = float(os.environ.get("PROXY_READ_TIMEOUT_SECONDS", "65"))
+PROXY_MAX_ATTEMPTS = int(os.environ.get("PROXY_MAX_ATTEMPTS", "3"))
+PROXY_RETRY_BASE_SECONDS = float(os.environ.get("PROXY_RETRY_BASE_SECONDS", "0.2"))
+# Ask the MCP server to gzip large responses for the cross-region hop (unwrapped here).
+PROXY_ACCEPT_COMPRESSION = os.environ.get("PROXY_ACCEPT_COMPRESSION", "true").lower() == "true"
+# Opt-in cache for deterministic metadata tools. Results are cached here, outside the
+# data region, so PROXY_CACHE_TOOLS can only narrow the tools known to carry no row data.
+_METADATA_TOOLS = frozenset({"get_schema_info"})
+PROXY_CACHE_ENABLED = os.environ.get("PROXY_CACHE_ENABLED", "false").lower() == "true"
+PROXY_CACHE_TOOLS = _METADATA_TOOLS & {t.strip() for t in os.environ.get("PROXY_CACHE_TOOLS", "get_schema_info").split(",")
+                                       if t.strip()}
+PROXY_CACHE_TTL_SECONDS = float(os.environ.get("PROXY_CACHE_TTL_SECONDS", "300"))
+PROXY_CACHE_MAX_ENTRIES = int(os.environ.get("PROXY_CACHE_MAX_ENTRIES", "64"))
+TOOL_DELIMITER = "___"
+LATENCY_BUCKETS_MS = (25, 50, 100, 150, 200, 250, 300, 400, 600, 1000, 2000, 5000, 10000, 30000)
+
+lambda_client = boto3.client("lambda", region_name=DATA_REGION, config=Config(
+    tcp_keepalive=True,
+    max_pool_connections=PROXY_MAX_POOL_CONNECTIONS,
+    connect_timeout=PROXY_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=PROXY_READ_TIMEOUT_SECONDS,
+    retries={"mode": "standard", "max_attempts": 1},
+))
+
+
+class LatencyHistogram:
+    """Cumulative per-container histogram of invoke latencies."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.total:
+            return None
+        rank, seen = q * self.total, 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else "inf"
+        return "inf"
+
+    def snapshot(self):
+        labels = [f"le_{b}" for b in self.bounds] + ["le_inf"]
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 1) if self.total else None,
+            "p50_ms": self.quantile(0.5), "p90_ms": self.quantile(0.9), "p99_ms": self.quantile(0.99),
+            "buckets": {label: count for label, count in zip(labels, self.counts) if count},
+        }
+
+
+class ResponseCache:
+    """TTL cache of tool responses keyed on tool name plus canonicalized arguments."""
+
+    def __init__(self, ttl=PROXY_CACHE_TTL_SECONDS, max_entries=PROXY_CACHE_MAX_ENTRIES):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(tool_name, arguments):
+        return f"{tool_name}:{json.dumps(arguments, sort_keys=True, separators=(',', ':'), default=str)}"
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._stats["hits"] += 1
+            return entry[1]
+        if entry:
+            del self._entries[key]
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, key, response):
+        self._entries[key] = (time.monotonic() + self._ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self):
+        return dict(self._stats, entries=len(self._entries))
+
+
+_invoke_latency = LatencyHistogram()
+_response_cache = ResponseCache()
+
+
+def _cache_key(tool_name, event):
+    """Cache key for an allowlisted tool call, or None when the call must not be cached."""
+    if not PROXY_CACHE_ENABLED or not tool_name:
+        return None
+    if tool_name.split(TOOL_DELIMITER)[-1] not in PROXY_CACHE_TOOLS:
+        return None
+    return ResponseCache.make_key(tool_name, event)
+
+
+def _invoke(invoke_kwargs):
+    """Invoke the MCP server, retrying (with jittered backoff) only failures that never reached it."""
+    for attempt in range(1, PROXY_MAX_ATTEMPTS + 1):
+        try:
+            return lambda_client.invoke(**invoke_kwargs)
+        except (lambda_client.exceptions.TooManyRequestsException, ConnectTimeoutError, EndpointConnectionError):
+            if attempt == PROXY_MAX_ATTEMPTS:
+                raise
+        time.sleep(random.uniform(0, PROXY_RETRY_BASE_SECONDS * 2 ** attempt))
 
 
 def handler(event, context):
@@ -18,13 +150,52 @@ def handler(event, context):
     }
 
     # Forward client context if present (contains bedrockAgentCoreToolName)
+    tool_name = None
+    ctx_data = {"custom": {}, "env": {}}
     cc = getattr(context, "client_context", None)
     if cc:
         try:
-            ctx_data = {"custom": cc.custom or {}, "env": cc.env or {}}
-            invoke_kwargs["ClientContext"] = base64.b64encode(json.dumps(ctx_data).encode()).decode()
+            ctx_data = {"custom": dict(cc.custom or {}), "env": cc.env or {}}
+            tool_name = ctx_data["custom"].get("bedrockAgentCoreToolName")
         except Exception:
             pass
+    if PROXY_ACCEPT_COMPRESSION:
+        ctx_data["custom"]["proxyAcceptEncoding"] = "gzip"
+    if cc or PROXY_ACCEPT_COMPRESSION:
+        invoke_kwargs["ClientContext"] = base64.b64encode(json.dumps(ctx_data).encode()).decode()
 
-    response = lambda_client.invoke(**invoke_kwargs)
-    return json.loads(response["Payload"].read())
+    cache_key = _cache_key(tool_name, event)
+    if cache_key:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            print(json.dumps({"metric": "proxy_invoke", "tool": tool_name, "cache": "hit",
+                              "cache_stats": _response_cache.stats()}))
+            return cached
+
+    t0 = time.perf_counter()
+    response = _invoke(invoke_kwargs)
+    payload = response["Payload"].read()
+    latency_ms = (time.perf_counter() - t0) * 1000
+    _invoke_latency.observe(latency_ms)
+
+    result = json.loads(payload)
+    metric = {
+        "metric": "proxy_invoke",
+        "tool": tool_name or event.get("name") or event.get("toolName"),
+        "latency_ms": round(latency_ms, 1),
+        "request_bytes": len(invoke_kwargs["Payload"]),
+        "response_bytes": len(payload),
+    }
+    if isinstance(result, dict) and result.get("_envelope") == "gzip+base64":
+        raw = gzip.decompress(base64.b64decode(result["payload"]))
+        result = json.loads(raw)
+        metric.update(compressed=True, uncompressed_bytes=len(raw),
+                      compression_ratio=round(len(raw) / max(len(payload), 1), 2))
+    if cache_key:
+        if isinstance(result, dict) and not result.get("isError"):
+            # The server's _meta counters describe this one invocation; a hit must not replay them.
+            _response_cache.put(cache_key, {k: v for k, v in result.items() if k != "_meta"})
+        metric.update(cache="miss", cache_stats=_response_cache.stats())
+    metric["histogram"] = _invoke_latency.snapshot()
+    print(json.dumps(metric))
+    return result
@@ -0,0 +1,49 @@
+import base64
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "lambda_mcp_server"))
+
+from result_cache import from_sources, normalize_sql, referenced_tables  # noqa: E402
+
+COMMA_JOIN = ("SELECT c.id, t.amount_usd FROM customers c, transactions t "
+              "WHERE t.customer_id = c.id ORDER BY id")
+
+
+def test_comma_join_lists_every_table():
+    normalized = normalize_sql(COMMA_JOIN)
+    assert referenced_tables(normalized) == {"customers", "transactions"}
+    assert len(from_sources(normalized)) == 2
+
+
+def test_from_sources_ignores_commas_in_select_list_and_subqueries():
+    normalized = normalize_sql("SELECT id, name FROM customers WHERE id IN (SELECT customer_id FROM transactions)")
+    assert from_sources(normalized) == ["customers", "transactions"]
+
+
+@pytest.fixture
+def lambda_function():
+    pytest.importorskip("pymssql")
+    pytest.importorskip("boto3")
+    import lambda_function
+    return lambda_function
+
+
+def test_comma_join_is_not_keyset_paged(lambda_function):
+    assert lambda_function._keyset_plan(COMMA_JOIN) is None
+    assert lambda_function._keyset_plan("SELECT a.id FROM customers a, customers b ORDER BY id") is None
+
+
+def test_single_table_is_keyset_paged(lambda_function):
+    plan = lambda_function._keyset_plan("SELECT id, name FROM customers WHERE segment = 'retail' ORDER BY id DESC")
+    assert plan[:2] == ("id", True)
+
+
+@pytest.mark.parametrize("state", [[1, 2], "abc", 7, {"after": 1}, {"fp": "x", "offset": "10"}, {"fp": "x"}])
+def test_malformed_continuation_token_is_rejected(lambda_function, state):
+    token = base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+    with pytest.raises(ValueError):
+        lambda_function._decode_token(token)